@@ -0,0 +1,168 @@
+# allocation.py
+"""
+Registry of allocation strategies
+
+An allocation strategy is a function that takes a list of `Robot`s and a list
+of `Item`s, schedules pick-ups on the robots, and returns the list of `Item`s
+that did not get picked up. Extra keyword arguments may be accepted for
+strategy-specific parameters. register_strategy wraps every strategy so that
+robots in carrying mode take their last load to the depot before it returns:
+the final drop-off is part of the allocation result, whoever calls it.
+
+Strategies other than 'simple' live in their own modules and register
+themselves when imported; get_strategy and strategy_names import all of
+`STRATEGY_MODULES` first, so every command line tool sees every strategy.
+"""
+
+
+import functools
+import heapq
+import importlib
+import inspect
+
+
+STRATEGIES = {}
+
+# Modules whose import registers more strategies
+STRATEGY_MODULES = ('sharding', 'edf', 'carrying')
+
+
+def register_strategy(name):
+    """
+    Returns a decorator that adds an allocation function to `STRATEGIES`
+    under `name`. The decorator returns, and registers, a wrapper that calls
+    deliver_loads on the robots once the function is done; the undecorated
+    function stays available as its `__wrapped__` attribute.
+
+    Parameter:
+    -----------
+
+    name: string; the name used to select the strategy, e.g. on the command line
+    """
+    def decorator(func):
+        if name in STRATEGIES and not _same_function(STRATEGIES[name].__wrapped__, func):
+            raise ValueError(f"Allocation strategy {name!r} is already registered")
+
+        @functools.wraps(func)
+        def strategy(robots, items, *args, **params):
+            items_remaining = func(robots, items, *args, **params)
+            deliver_loads(robots)
+            return items_remaining
+
+        STRATEGIES[name] = strategy
+        return strategy
+    return decorator
+
+
+def _same_function(a, b):
+    """
+    Returns True if `a` and `b` are the same function, possibly defined twice:
+    a strategy module run as a script is also imported by load_strategies
+    """
+    return a.__qualname__ == b.__qualname__ and a.__code__.co_filename == b.__code__.co_filename
+
+
+def deliver_loads(robots):
+    """
+    Schedules the final trip to the depot of every `Robot` in carrying mode
+    that still carries items after allocation. Does nothing for robots that
+    are not in carrying mode.
+
+    Parameter:
+    -----------
+
+    robots: list; each element is a `Robot` whose allocation is complete
+    """
+    for robot in robots:
+        robot.deliver_load()
+
+
+def load_strategies():
+    """
+    Imports every module of `STRATEGY_MODULES`, registering its strategies.
+    Importing an already imported module does nothing.
+    """
+    for module in STRATEGY_MODULES:
+        importlib.import_module(module)
+
+
+def get_strategy(name):
+    """
+    Returns the allocation function registered under `name`.
+
+    Raises KeyError with the list of known strategies if `name` is unknown.
+
+    Parameter:
+    -----------
+
+    name: string; the name of a registered strategy
+    """
+    load_strategies()
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        known = ", ".join(sorted(STRATEGIES))
+        raise KeyError(f"Unknown allocation strategy {name!r} (known: {known})") from None
+
+
+def strategy_names():
+    """
+    Returns a sorted list of the names of all registered strategies.
+    """
+    load_strategies()
+    return sorted(STRATEGIES)
+
+
+def room_params(strategy, params, room_size):
+    """
+    Returns the keyword arguments to call `strategy` with: `params`, plus
+    the dimensions of the room as `room_size` if the strategy accepts that
+    keyword and `params` does not already set it.
+
+    Parameters:
+    -----------
+
+    strategy: function; an allocation strategy
+
+    params: dict; keyword arguments for the strategy
+
+    room_size: length-2 list; the dimensions of the room, as returned by
+    main.load_room
+    """
+    if 'room_size' not in params and 'room_size' in inspect.signature(strategy).parameters:
+        params = dict(params, room_size=room_size)
+    return params
+
+
+def liftable(robots, items):
+    """
+    Returns a list telling for each of `items` whether any of `robots` could
+    lift it at all (with num_arms=0, as in simple_allocation). The others
+    need not be offered to any robot. Without robots, no item can be lifted.
+
+    Parameters:
+    -----------
+
+    robots: list; each element is a `Robot`
+
+    items: iterable; the `Item`s
+    """
+    if not robots:
+        return [False for _ in items]
+    max_load = max(robot._max_weight for robot in robots)
+    return [item.valid_pickup(max_load, 0) for item in items]
+
+
+def free_heap(robots):
+    """
+    Returns a heap of (time at which the robot is free, position in `robots`)
+    for strategies that dispatch whichever robot is free first.
+
+    Parameter:
+    -----------
+
+    robots: list; each element is a `Robot`
+    """
+    free = [(robot.total_operation_time(), n) for n, robot in enumerate(robots)]
+    heapq.heapify(free)
+    return free
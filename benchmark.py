@@ -0,0 +1,360 @@
+# benchmark.py
+"""
+Benchmark suite for the stages of the simulation pipeline
+
+Stages, named after the functions in main.py:
+    parse     main.load_room (the parsing done by run_robots)
+    allocate  the allocation strategy (simple_allocation by default)
+    locate    a sweep of Robot.get_location over sampled timesteps
+    output    main.output_results (printing to a null device)
+    frame     main.draw_frame, the per-frame cost of animate (Agg backend)
+
+With --imports, the time to import the scheduling modules in a fresh
+interpreter is measured too, next to matplotlib.pyplot for reference, and
+whether importing them pulled in matplotlib.
+
+Scenarios are generated with generate.py for each requested size. Results
+can be saved as a JSON baseline and compared against a saved baseline;
+stages that got slower than the threshold are flagged as regressions.
+
+Example:
+    python benchmark.py --sizes 10x1000,50x10000 --save baseline.json
+    python benchmark.py --sizes 10x1000,50x10000 --compare baseline.json
+    python benchmark.py --sizes '' --imports
+"""
+
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import main
+from allocation import get_strategy, room_params, strategy_names
+from generate import write_room
+
+
+def parse_size(text):
+    """
+    Returns (n_robots, n_items) from a size string such as '10x1000'.
+
+    Parameter:
+    -----------
+
+    text: string; number of robots and number of items separated by 'x'
+    """
+    robots, sep, items = text.lower().partition('x')
+    if not sep:
+        raise ValueError(f"Expected ROBOTSxITEMS, got {text!r}")
+    return int(robots), int(items)
+
+
+def sample_times(sim_time, count):
+    """
+    Returns a list of at most `count` evenly spaced timesteps in [0, sim_time].
+
+    Parameters:
+    -----------
+
+    sim_time: int; the last timestep
+
+    count: int; the maximum number of timesteps to return
+    """
+    step = max(1, (sim_time + 1) // max(count, 1))
+    return list(range(0, sim_time + 1, step))[:count]
+
+
+def run_stages(data_filename, strategy, locate_samples, frames):
+    """
+    Runs every stage once on `data_filename` and yields (stage, work, unit)
+    tuples, each after its stage has finished; `work` is the number of units
+    processed by the stage. A stage of None marks the end of untimed setup
+    for the next stage.
+
+    Parameters:
+    -----------
+
+    data_filename: string; the room file to run
+
+    strategy: function; the allocation strategy
+
+    locate_samples: int; number of timesteps in the get_location sweep
+
+    frames: int; number of frames drawn for the frame stage
+    """
+    sim_time, room_size, robots, items = main.load_room(data_filename)
+    yield 'parse', len(robots) + len(items), 'lines/s'
+
+    items_remaining = strategy(robots, items, **room_params(strategy, {}, room_size))
+    yield 'allocate', len(items), 'items/s'
+
+    times = sample_times(sim_time, locate_samples)
+    for t in times:
+        for robot in robots:
+            robot.get_location(t)
+    yield 'locate', len(times) * len(robots), 'queries/s'
+
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        main.output_results(robots, items_remaining)
+    yield 'output', len(items), 'items/s'
+
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    times = sample_times(sim_time, frames)
+    # Warm-up frame: the first draw sets up the figure's fonts and canvas
+    main.draw_frame(robots, items, 0, room_size)
+    fig.canvas.draw()
+    yield None, 0, None
+    for t in times:
+        main.draw_frame(robots, items, t, room_size)
+        fig.canvas.draw()
+    plt.close(fig)
+    yield 'frame', len(times), 'frames/s'
+
+
+def time_stages(data_filename, strategy, locate_samples, frames):
+    """
+    Returns a dict mapping each stage to (seconds, work, unit) for one run.
+
+    Parameters: see run_stages
+    """
+    results = {}
+    start = time.perf_counter()
+    for stage, work, unit in run_stages(data_filename, strategy, locate_samples, frames):
+        end = time.perf_counter()
+        if stage is not None:
+            results[stage] = (end - start, work, unit)
+        start = time.perf_counter()
+    return results
+
+
+def memory_stages(data_filename, strategy, locate_samples, frames):
+    """
+    Returns a dict mapping each stage to its peak traced memory in bytes,
+    measured with tracemalloc during a separate run.
+
+    Parameters: see run_stages
+    """
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for stage, _, _ in run_stages(data_filename, strategy, locate_samples, frames):
+            # The setup of a stage counts toward its peak
+            if stage is not None:
+                peaks[stage] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def benchmark_size(size, args, strategy, workdir):
+    """
+    Generates the scenario for `size`, benchmarks it and returns a dict
+    mapping each stage to its results.
+
+    Parameters:
+    -----------
+
+    size: string; ROBOTSxITEMS
+
+    args: argparse.Namespace; the parsed command line options
+
+    strategy: function; the allocation strategy
+
+    workdir: string; directory for the generated room file
+    """
+    n_robots, n_items = parse_size(size)
+    data_filename = os.path.join(workdir, f"room_{size}.txt")
+    write_room(data_filename, n_robots, n_items, args.width, args.width, args.sim_time,
+               distribution=args.distribution, seed=args.seed)
+
+    best = {}
+    for _ in range(args.repeat):
+        for stage, (seconds, work, unit) in time_stages(
+                data_filename, strategy, args.locate_samples, args.frames).items():
+            if stage not in best or seconds < best[stage][0]:
+                best[stage] = (seconds, work, unit)
+
+    peaks = {}
+    if args.memory:
+        peaks = memory_stages(data_filename, strategy, args.locate_samples, args.frames)
+
+    results = {}
+    for stage, (seconds, work, unit) in best.items():
+        results[stage] = {'seconds': seconds,
+                          'throughput': work / seconds if seconds > 0 else None,
+                          'unit': unit,
+                          'peak_bytes': peaks.get(stage)}
+    os.remove(data_filename)
+    return results
+
+
+IMPORT_MODULES = ('interval', 'item', 'robot', 'main', 'matplotlib.pyplot')
+
+IMPORT_SCRIPT = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start, 'matplotlib' in sys.modules)\n"
+)
+
+
+def import_times(repeat):
+    """
+    Returns a dict mapping 'import <module>' to its result dict for every
+    module in IMPORT_MODULES; each import runs in a fresh interpreter and the
+    best of `repeat` runs is kept. The unit records whether matplotlib was
+    loaded as a side effect.
+
+    Parameter:
+    -----------
+
+    repeat: int; number of fresh interpreters per module
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for module in IMPORT_MODULES:
+        best = None
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT.format(module=module)],
+                                    cwd=here, capture_output=True, text=True, check=True).stdout
+            seconds, loaded = output.split()
+            best = min(best or float('inf'), float(seconds))
+        unit = 'with mpl' if loaded == 'True' else 'no mpl'
+        results[f"import {module}"] = {'seconds': best, 'throughput': None,
+                                       'unit': unit, 'peak_bytes': None}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a list of (size, stage, old_seconds, new_seconds) for every stage
+    that is more than `threshold` (a fraction) slower than in `baseline`.
+    Sizes and stages missing from either side are ignored.
+
+    Parameters:
+    -----------
+
+    results: dict; size -> stage -> result dict, as built by benchmark_size
+
+    baseline: dict; the same structure loaded from a saved baseline
+
+    threshold: float; allowed slowdown, e.g. 0.2 for 20%
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            old = baseline.get(size, {}).get(stage)
+            if old is None:
+                continue
+            if result['seconds'] > old['seconds'] * (1 + threshold):
+                regressions.append((size, stage, old['seconds'], result['seconds']))
+    return regressions
+
+
+def format_table(results):
+    """
+    Returns the benchmark results as a printable table
+
+    Parameter:
+    -----------
+
+    results: dict; size -> stage -> result dict
+    """
+    lines = [f"{'size':<14}{'stage':<26}{'seconds':>10}{'throughput':>16}  {'unit':<10}{'peak KiB':>10}"]
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            throughput = result['throughput']
+            throughput = f"{throughput:16.1f}" if throughput is not None else f"{'-':>16}"
+            peak = result['peak_bytes']
+            peak = f"{peak / 1024:10.1f}" if peak is not None else f"{'-':>10}"
+            lines.append(f"{size:<14}{stage:<26}{result['seconds']:10.4f}{throughput}  "
+                         f"{result['unit']:<10}{peak}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    """
+    Returns the argparse.ArgumentParser for the command line interface
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the parse, allocate, locate, output and frame stages.")
+    parser.add_argument('--sizes', default='10x1000,20x2000',
+                        help="comma-separated ROBOTSxITEMS scenario sizes (default: 10x1000,20x2000)")
+    parser.add_argument('--strategy', default='simple', choices=strategy_names(),
+                        help="allocation strategy (default: simple)")
+    parser.add_argument('--distribution', default='uniform', help="item distribution passed to generate.py")
+    parser.add_argument('--width', type=int, default=100, help="room width and height (default: 100)")
+    parser.add_argument('--sim-time', type=int, default=1000, help="number of timesteps (default: 1000)")
+    parser.add_argument('--seed', type=int, default=0, help="scenario seed (default: 0)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per size; the best is kept (default: 3)")
+    parser.add_argument('--locate-samples', type=int, default=50,
+                        help="timesteps in the get_location sweep (default: 50)")
+    parser.add_argument('--frames', type=int, default=1, help="frames drawn for the frame stage (default: 1)")
+    parser.add_argument('--imports', action='store_true',
+                        help="also time importing the scheduling modules in a fresh interpreter")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the tracemalloc run that measures peak memory")
+    parser.add_argument('--save', metavar='FILE', help="write the results to FILE as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="flag regressions against the baseline in FILE")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown fraction counted as a regression (default: 0.2)")
+    return parser
+
+
+def main_cli(argv=None):
+    """
+    Runs the benchmarks with the arguments `argv` (default: sys.argv[1:]).
+    Returns the process exit status: 1 if regressions were found, else 0.
+
+    Parameter:
+    -----------
+
+    argv: list; the command line arguments, or None
+    """
+    args = build_parser().parse_args(argv)
+    import matplotlib
+    matplotlib.use('Agg')
+    # draw_frame's fixed axis limits make matplotlib warn on every frame
+    logging.getLogger('matplotlib').setLevel(logging.ERROR)
+    strategy = get_strategy(args.strategy)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in filter(None, args.sizes.split(',')):
+            size = size.strip()
+            results[size] = benchmark_size(size, args, strategy, workdir)
+    if args.imports:
+        results['imports'] = import_times(args.repeat)
+    print(format_table(results))
+
+    if args.save:
+        document = {'meta': {'python': platform.python_version(),
+                             'platform': platform.platform(),
+                             'strategy': args.strategy,
+                             'seed': args.seed},
+                    'results': results}
+        with open(args.save, 'w') as fid:
+            json.dump(document, fid, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as fid:
+            baseline = json.load(fid)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for size, stage, old, new in regressions:
+            print(f"REGRESSION {size} {stage}: {old:.4f} s -> {new:.4f} s ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,291 @@
+# cache.py
+"""
+Content-addressed cache of allocation results
+
+A scenario is keyed by the SHA-256 of the room file's bytes together with
+the strategy name and its parameters, so renaming or copying a room file
+still hits, and any edit to it misses. Each entry is one .npz file holding
+the parsed room as arrays and the finished schedule as a checkpoint (see
+checkpoint.py). On a hit the `Robot`s and `Item`s are rebuilt from the
+arrays and the schedule is restored onto them, without parsing the room file
+or running the strategy.
+
+Entries live in a directory whose total size is kept under a bound, evicting
+the least recently used entries first (an entry's modification time is
+refreshed on every hit). An in-process memo of the most recent entries sits
+on top, so repeated runs in the same process do not even read the disk.
+
+Example:
+    python cli.py room1.txt --no-animate --cache .robot-cache
+"""
+
+
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import struct
+import tempfile
+import zipfile
+import numpy as np
+
+import checkpoint
+from item import Item
+from robot import Robot
+
+
+def scenario_key(data_filename, strategy, params):
+    """
+    Returns the cache key (a hex string) of running `strategy` with `params`
+    on the room file `data_filename`.
+
+    Parameters:
+    -----------
+
+    data_filename: string; the name of the room file
+
+    strategy: string; the name of the allocation strategy
+
+    params: dict; keyword arguments passed on to the strategy
+    """
+    digest = hashlib.sha256()
+    with open(data_filename, 'rb') as fid:
+        for block in iter(lambda: fid.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(b'\0' + strategy.encode() + b'\0')
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+def to_arrays(sim_time, room_size, robots, items):
+    """
+    Returns a dict of numpy arrays holding the room and its schedule.
+
+    Parameters:
+    -----------
+
+    sim_time, room_size, robots, items: as returned by main.load_room, after
+    allocation
+    """
+    depot = robots[0]._depot if robots else None
+    return {
+        'room': np.array([sim_time, room_size[0], room_size[1]], dtype=float),
+        'depot': np.array([] if depot is None else
+                          [depot[0], depot[1], robots[0]._unload_time], dtype=float),
+        'robot_ids': np.array([robot.get_id() for robot in robots], dtype=np.int64),
+        'robot_max_weight': np.array([robot._max_weight for robot in robots], dtype=float),
+        'robot_loc': np.array([robot._init_loc for robot in robots], dtype=float).reshape(-1, 2),
+        'item_ids': np.array([item.id_ for item in items], dtype=np.int64),
+        'item_names': np.array([item.name for item in items], dtype=str),
+        'item_weight': np.array([item.weight for item in items], dtype=float),
+        'item_loc': np.array([item.loc for item in items], dtype=float).reshape(-1, 2),
+        'item_arms': np.array([item.arm_requirement for item in items], dtype=np.int64),
+        'item_duration': np.array([item.duration for item in items], dtype=np.int64),
+        'item_release': np.array([item.release_time for item in items], dtype=np.int64),
+        # -1 for no due time
+        'item_due': np.array([-1 if item.due_time is None else item.due_time for item in items],
+                             dtype=np.int64),
+        'schedule': np.frombuffer(checkpoint.dumps(robots, items), dtype=np.uint8),
+    }
+
+
+def from_arrays(arrays):
+    """
+    Returns (sim_time, room_size, robots, items, items_remaining) rebuilt from
+    the arrays of to_arrays, with the schedule restored.
+
+    Parameter:
+    -----------
+
+    arrays: dict; the arrays of an entry
+    """
+    sim_time, width, height = arrays['room'].tolist()
+    sim_time = int(sim_time)
+    robots = [Robot(robot_id, max_weight, sim_time, loc)
+              for robot_id, max_weight, loc in zip(arrays['robot_ids'].tolist(),
+                                                   arrays['robot_max_weight'].tolist(),
+                                                   arrays['robot_loc'].tolist())]
+    depot = arrays['depot'].tolist()
+    if depot:
+        for robot in robots:
+            robot.set_depot(depot[:2], int(depot[2]))
+
+    items = []
+    for id_, name, weight, loc, arms, duration, release, due in zip(
+            arrays['item_ids'].tolist(), arrays['item_names'].tolist(),
+            arrays['item_weight'].tolist(), arrays['item_loc'].tolist(),
+            arrays['item_arms'].tolist(), arrays['item_duration'].tolist(),
+            arrays['item_release'].tolist(), arrays['item_due'].tolist()):
+        items.append(Item(id_, name, weight, loc, arms, duration, release,
+                          None if due < 0 else due))
+
+    checkpoint.loads(arrays['schedule'].tobytes(), robots, items)
+    items_remaining = [item for item in items if item.picked_window is None]
+    return sim_time, [width, height], robots, items, items_remaining
+
+
+class ResultCache:
+    """
+    A ResultCache stores finished allocations on disk, keyed by scenario_key.
+
+    Attributes:
+    -----------
+
+    directory: string; the directory holding the .npz entries
+
+    max_bytes: int; the bound on the total size of the entries
+
+    hits: int; lookups answered from the in-process memo or the disk
+
+    memo_hits: int; the part of `hits` answered from the in-process memo
+
+    misses: int; lookups that found no entry
+
+    evictions: int; entries removed to stay under `max_bytes`
+    """
+
+
+    def __init__(self, directory, max_bytes=256 * 2**20, memo_entries=8):
+        """
+        Initializes a ResultCache object, creating `directory` if needed
+
+        Parameters:
+        -----------
+
+        directory: string; the directory holding the entries
+
+        max_bytes: int; the bound on the total size of the entries.
+        Default: 256 MiB
+
+        memo_entries: int; how many entries the in-process memo keeps.
+        Default: 8
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memo = OrderedDict()
+        self._memo_entries = memo_entries
+        self.hits = self.memo_hits = self.misses = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+
+    def _remember(self, key, arrays):
+        self._memo[key] = arrays
+        self._memo.move_to_end(key)
+        while len(self._memo) > self._memo_entries:
+            self._memo.popitem(last=False)
+
+
+    def get(self, key):
+        """
+        Returns (sim_time, room_size, robots, items, items_remaining) for
+        `key`, freshly built so that the caller may change them, or None on a
+        miss. An entry that cannot be read or restored is removed and counts
+        as a miss.
+
+        Parameter:
+        -----------
+
+        key: string; a key returned by scenario_key
+        """
+        path = self._path(key)
+        arrays = self._memo.get(key)
+        in_memo = arrays is not None
+        try:
+            if not in_memo:
+                with np.load(path, allow_pickle=False) as npz:
+                    arrays = {name: npz[name] for name in npz.files}
+            result = from_arrays(arrays)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError, struct.error):
+            # Cut short by a crash, or a schedule that no longer matches
+            self.discard(key)
+            self.misses += 1
+            return None
+
+        if in_memo:
+            self._memo.move_to_end(key)
+            self.memo_hits += 1
+        else:
+            self._remember(key, arrays)
+        if os.path.exists(path):
+            # Mark the entry as recently used
+            os.utime(path)
+        self.hits += 1
+        return result
+
+
+    def put(self, key, sim_time, room_size, robots, items):
+        """
+        Stores the finished allocation of a scenario under `key`, then evicts
+        the least recently used entries until the cache fits in `max_bytes`.
+
+        Parameters:
+        -----------
+
+        key: string; a key returned by scenario_key
+
+        sim_time, room_size, robots, items: as returned by main.load_room,
+        after allocation
+        """
+        arrays = to_arrays(sim_time, room_size, robots, items)
+        self._remember(key, arrays)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        # Write to a temporary file first so readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fid:
+            fid.write(buffer.getbuffer())
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+
+    def discard(self, key):
+        """
+        Removes the entry for `key`, if there is one
+
+        Parameter:
+        -----------
+
+        key: string; a key returned by scenario_key
+        """
+        self._memo.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the total size of the
+        entries is at most `max_bytes`. The most recent entry is always kept.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            self._memo.pop(name[:-len('.npz')], None)
+            total -= size
+            self.evictions += 1
+
+
+    def stats(self):
+        """
+        Returns a dict of the hit and miss counters and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'memo_hits': self.memo_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,169 @@
+# carrying.py
+"""
+Batched trips for robots in carrying mode
+
+In carrying mode (a Depot line in the room file, see Robot.set_depot) a robot
+carries the items it picks until the next one would exceed its `_max_weight`,
+then unloads at the depot. simple_allocation hands out items in file order,
+so a trip can zig-zag across the room. batched_allocation instead fills each
+trip from where the robot stands: the robot that is free first takes the
+nearest open item that still fits in its load, and once nothing fits it
+starts the next trip with the item nearest to the depot.
+
+Registered as the 'batched' strategy, e.g.
+    python cli.py room.txt --strategy batched --no-animate
+
+Items per timestep of the one-at-a-time model against carrying and batching:
+    python carrying.py room.txt --depot 0,0
+"""
+
+
+from allocation import free_heap, liftable, register_strategy
+from main import load_room, simple_allocation
+from item import DropOff
+from robot import travel_time, travel_times
+import argparse
+import heapq
+import math
+import numpy as np
+
+
+@register_strategy('batched')
+def batched_allocation(robots, items, lookahead=16):
+    """
+    Allocates item pickups trip by trip, nearest item first. Robots that are
+    not in carrying mode simply take the nearest open item each time.
+
+    Returns: list; a list of remaining `Item`s that did not get picked up.
+
+    Parameters:
+    -----------
+
+    robots: list; list of unique `Robot` references
+
+    items: list; non-empty list of unique `Item` references
+
+    lookahead: int; how many of the nearest items a robot tries at first.
+    If none of them can be picked up, the robot tries twice as many, and so
+    on, and is only retired once it has tried every open item.  Default: 16
+    """
+    locs = np.array([item.loc for item in items], dtype=float).reshape(-1, 2)
+    weights = np.array([item.weight for item in items], dtype=float)
+    release = np.array([item.release_time for item in items], dtype=float)
+    duration = np.array([item.duration for item in items], dtype=float)
+    due = np.array([math.inf if item.due_time is None else item.due_time for item in items], dtype=float)
+    open_ = np.array([item.picked_window is None for item in items], dtype=bool)
+    open_ &= np.array(liftable(robots, items), dtype=bool)
+    shift_end = max((robot._total_time for robot in robots), default=0)
+    free = free_heap(robots)
+
+    def pick_nearest(robot, candidates, origin, departure_time):
+        # Picks the nearest of `candidates` that the robot, leaving `origin`
+        # at `departure_time`, can still pick up in time (as in Robot.pick)
+        # and returns True, or returns False if there is none
+        distance = travel_times(locs[candidates], origin)
+        finish_time = np.maximum(departure_time + distance, release[candidates]) + duration[candidates]
+        end_time = finish_time
+        if robot._depot is not None:
+            # The item must still reach the depot
+            end_time = finish_time + travel_times(locs[candidates], robot._depot) + robot._unload_time
+        in_time = (finish_time <= due[candidates]) & (end_time <= robot._total_time)
+        candidates, distance = candidates[in_time], distance[in_time]
+
+        tried = np.zeros(len(candidates), dtype=bool)
+        width = lookahead
+        while not tried.all():
+            if len(candidates) > width:
+                nearest = np.argpartition(distance, width)[:width]
+            else:
+                nearest = np.arange(len(candidates))
+            nearest = nearest[np.argsort(distance[nearest], kind='stable')]
+            for k in nearest[~tried[nearest]].tolist():
+                tried[k] = True
+                if robot.pick(items[candidates[k]], do_pick=True, num_arms=0):
+                    open_[candidates[k]] = False
+                    return True
+            width *= 2
+        return False
+
+    while free and open_.any():
+        now, n = heapq.heappop(free)
+        robot = robots[n]
+        # No robot, not even one standing at the item, could finish these in
+        # time any more, as no robot is free before `now`
+        open_ &= np.maximum(release, now) + duration <= np.minimum(due, shift_end)
+
+        origin = robot.latest_resting_loc()
+        departure_time = robot.total_operation_time()
+        fits = open_ & (weights <= robot._max_weight)
+        trips = [(fits, origin, departure_time)]
+        if robot._depot is not None and robot._load > 0:
+            # The next item starts a new trip from the depot, unless it still
+            # fits in the load
+            new_trip = (robot._depot,
+                        departure_time + travel_time(origin, robot._depot) + robot._unload_time)
+            if robot._batch:
+                same_trip = fits & (weights <= robot._max_weight - robot._load)
+                trips = [(same_trip, origin, departure_time), (fits & ~same_trip,) + new_trip]
+            else:
+                trips = [(fits,) + new_trip]
+
+        for mask, origin, departure_time in trips:
+            if pick_nearest(robot, np.flatnonzero(mask), origin, departure_time):
+                heapq.heappush(free, (robot.total_operation_time(), n))
+                break
+
+    return [item for item in items if item.picked_window is None]
+
+
+def carrying_stats(robots):
+    """
+    Returns (items picked, depot drop-offs, makespan, items per timestep) of
+    an allocation. Items per timestep is 0.0 when nothing was picked.
+
+    Parameter:
+    -----------
+
+    robots: list; the allocated `Robot`s
+    """
+    picked = drop_offs = 0
+    for robot in robots:
+        for item in robot.get_items_picked():
+            if isinstance(item, DropOff):
+                drop_offs += 1
+            elif not item.is_stop:
+                picked += 1
+    makespan = max((robot.total_operation_time() for robot in robots), default=0)
+    return picked, drop_offs, makespan, picked / makespan if makespan else 0.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare one-at-a-time, carrying and batched allocation.")
+    parser.add_argument('room', help="room file")
+    parser.add_argument('--depot', default=None,
+                        help="depot location X,Y (default: the room's Depot line, else 0,0)")
+    parser.add_argument('--unload-time', type=int, default=1, help="time steps to unload (default: 1)")
+    args = parser.parse_args()
+
+    rows = []
+    for name, batch, strategy in (('one-at-a-time', False, simple_allocation),
+                                  ('carrying', True, simple_allocation),
+                                  ('batched', True, batched_allocation)):
+        sim_time, room_size, robots, items = load_room(args.room)
+        if args.depot is not None:
+            depot = [float(value) for value in args.depot.split(',')]
+        elif robots[0]._depot is not None:
+            depot = robots[0]._depot
+        else:
+            depot = [0.0, 0.0]
+        for robot in robots:
+            robot.set_depot(depot, args.unload_time, batch)
+        strategy(robots, items)
+        rows.append((name,) + carrying_stats(robots))
+
+    print(f"{'':<15}{'picked':>8}{'drop-offs':>11}{'makespan':>10}{'items/step':>12}")
+    for name, picked, drop_offs, makespan, rate in rows:
+        print(f"{name:<15}{picked:>8}{drop_offs:>11}{makespan:>10}{rate:>12.4f}")
+    base = rows[0][4]
+    for name, _, _, _, rate in rows[1:]:
+        print(f"{name}: {rate / base if base else 0.0:.2f}x the items per timestep of one-at-a-time")
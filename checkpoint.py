@@ -0,0 +1,375 @@
+# checkpoint.py
+"""
+Compact binary checkpoints of allocation state
+
+A checkpoint stores the pick-up order of every `Robot` (its `_items_picked`)
+and the `picked_window` of every `Item` as flat little-endian integer
+arrays, not as pickled objects. Restoring applies the state to the `Robot`s
+and `Item`s of a freshly loaded copy of the same room, so a run can be
+resumed, or branched into several what-if runs, without re-allocating.
+
+Layout (version 1):
+
+    header   magic b'RBCK', version (u16), reserved (u16), number of robots,
+             number of items, number of picked items, number of stops
+             (4 x u64)
+    int64    robot ids                         [number of robots]
+    int64    items picked per robot            [number of robots]
+    int64    item ids                          [number of items]
+    int64    picked item ids, robot order      [number of picked items]
+    int64    picked_window left, -1 if None    [number of items]
+    int64    picked_window right, -1 if None   [number of items]
+    int64    stop robot, index in robots       [number of stops]
+    int64    stop index in the robot's schedule, counting items and
+             stops                             [number of stops]
+    int64    stop kind, index in STOP_TYPES    [number of stops]
+    int64    stop window left                  [number of stops]
+    int64    stop window right                 [number of stops]
+    float64  stop x                            [number of stops]
+    float64  stop y                            [number of stops]
+
+Stops are the entries of a robot's schedule that are not items: depot
+drop-offs and idle periods.
+
+loads always restores every robot and item. It rebuilds one `Interval` per
+picked item, which takes about a second at 10^6 items (0.8 to 1.9 s
+measured with --bench 1000000). To branch what-if runs faster, a `Branch`
+restores a checkpoint once and then reverts only the robots whose schedule
+changed since, which takes milliseconds.
+
+Example (save/load throughput):
+    python checkpoint.py --bench 1000000
+"""
+
+
+from interval import Interval
+from item import DropOff, Idle
+import argparse
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+
+
+MAGIC = b'RBCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQQQ')
+STOP_TYPES = (DropOff, Idle)
+
+
+def dumps(robots, items):
+    """
+    Returns the checkpoint (bytes) of the allocation state of `robots` and
+    `items`.
+
+    Parameters:
+    -----------
+
+    robots: list; each element is a `Robot`
+
+    items: list; each element is an `Item`, with a unique id_; every item
+    picked by a robot must be in this list
+    """
+    counts = []
+    order = []
+    stops = ([], [], [], [], [], [], [])
+    for n, robot in enumerate(robots):
+        ids = [item.id_ for item in robot._items_picked]
+        if None in ids:
+            # Stops have no id; they are kept apart from the items
+            for position, item in enumerate(robot._items_picked):
+                if item.is_stop:
+                    values = (n, position, STOP_TYPES.index(type(item)), item.picked_window.left,
+                              item.picked_window.right, item.loc[0], item.loc[1])
+                    for column, value in zip(stops, values):
+                        column.append(value)
+            ids = [id_ for id_ in ids if id_ is not None]
+        counts.append(len(ids))
+        order.extend(ids)
+
+    windows = [item.picked_window for item in items]
+    left = [-1 if window is None else window.left for window in windows]
+    right = [-1 if window is None else window.right for window in windows]
+
+    parts = [HEADER.pack(MAGIC, VERSION, 0, len(robots), len(items), len(order), len(stops[0])),
+             np.array([robot.get_id() for robot in robots], dtype='<i8').tobytes(),
+             np.array(counts, dtype='<i8').tobytes(),
+             np.array([item.id_ for item in items], dtype='<i8').tobytes(),
+             np.array(order, dtype='<i8').tobytes(),
+             np.array(left, dtype='<i8').tobytes(),
+             np.array(right, dtype='<i8').tobytes()]
+    parts.extend(np.array(column, dtype='<i8').tobytes() for column in stops[:5])
+    parts.extend(np.array(column, dtype='<f8').tobytes() for column in stops[5:])
+    return b''.join(parts)
+
+
+def loads(data, robots, items):
+    """
+    Restores the allocation state in the checkpoint `data` (bytes) onto
+    `robots` and `items`, which must be the robots and items of the same room
+    in the same order. Items that were not scheduled get a picked_window of
+    None. Raises ValueError if the checkpoint does not match.
+
+    Parameters:
+    -----------
+
+    data: bytes; a checkpoint returned by dumps
+
+    robots: list; each element is a `Robot`
+
+    items: list; each element is an `Item`
+    """
+    _restore(data, robots, items)
+
+
+def _restore(data, robots, items):
+    """
+    Does the work of loads and returns, for each robot, its schedule and the
+    positions in `items` of the items of the schedule
+    """
+    n_robots, n_items, n_picked, n_stops, arrays = _columns(data)
+    if n_robots != len(robots) or n_items != len(items):
+        raise ValueError(f"Checkpoint has {n_robots} robots and {n_items} items, "
+                         f"room has {len(robots)} and {len(items)}")
+
+    robot_ids, counts, item_ids, order, left, right = arrays[:6]
+
+    if robot_ids.tolist() != [robot.get_id() for robot in robots]:
+        raise ValueError("Checkpoint robot ids do not match the room")
+    if item_ids.tolist() != [item.id_ for item in items]:
+        raise ValueError("Checkpoint item ids do not match the room")
+
+    # Map the picked item ids back to positions in `items`; every id must
+    # name exactly one item, and no item may be picked twice
+    sorter = np.argsort(item_ids, kind='stable')
+    if n_items and (item_ids[sorter[1:]] == item_ids[sorter[:-1]]).any():
+        raise ValueError("The room has duplicate item ids")
+    positions = sorter[np.searchsorted(item_ids, order, sorter=sorter).clip(0, max(n_items - 1, 0))]
+    if n_picked and not np.array_equal(item_ids[positions], order):
+        raise ValueError("Checkpoint schedules name items that are not in the room")
+    picked = np.zeros(n_items, dtype=bool)
+    picked[positions] = True
+    if picked.sum() != n_picked or (left[positions] < 0).any():
+        raise ValueError("Checkpoint schedules do not match the picked windows")
+    if counts.sum() != n_picked:
+        raise ValueError("Checkpoint schedule lengths do not add up")
+
+    # In the order of `items`, which is usually their order in memory
+    for item, l, r in zip(items, left.tolist(), right.tolist()):
+        item.picked_window = Interval(l, r) if l >= 0 else None
+
+    # Object-array indexing gathers the items of all schedules at C speed
+    item_array = np.empty(n_items, dtype=object)
+    item_array[:] = items
+    ends = np.cumsum(counts).tolist()
+    schedules = [part.tolist() for part in np.split(item_array[positions], ends[:-1])]
+
+    # Put the stops back in place, in schedule order
+    stops = [column.tolist() for column in arrays[6:]]
+    for n, position, kind, l, r, x, y in zip(*stops):
+        stop = STOP_TYPES[kind]([x, y], r - l)
+        stop.update_pickup_status(l)
+        schedules[n].insert(position, stop)
+
+    for robot, schedule in zip(robots, schedules):
+        robot.load_items_picked(schedule)
+    return list(zip(schedules, np.split(positions, ends[:-1])))
+
+
+def _columns(data):
+    """
+    Returns (number of robots, number of items, number of picked items,
+    number of stops, arrays) of the checkpoint `data`. The arrays are views
+    of `data`, in the order of the layout.
+    """
+    magic, version = struct.unpack_from('<4sH', data)
+    if magic != MAGIC:
+        raise ValueError("Not a checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+    _, _, _, n_robots, n_items, n_picked, n_stops = HEADER.unpack_from(data)
+    columns = [(n_robots, '<i8'), (n_robots, '<i8'), (n_items, '<i8'), (n_picked, '<i8'),
+               (n_items, '<i8'), (n_items, '<i8')]
+    columns += [(n_stops, '<i8')] * 5 + [(n_stops, '<f8')] * 2
+    arrays = []
+    offset = HEADER.size
+    for count, dtype in columns:
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+        offset += 8 * count
+    return n_robots, n_items, n_picked, n_stops, arrays
+
+
+class Branch:
+    """
+    A what-if branch from a checkpoint. The checkpoint is restored onto the
+    robots and items once, in full; after the schedules are changed, revert
+    goes back to the checkpoint, restoring only the robots whose schedule
+    changed.
+
+    revert tracks the changes made through `Robot` methods (counted in
+    `Robot._revision`) and the picked_windows of the items that the changed
+    robots held in the checkpoint or hold now. Any other change to an `Item`,
+    e.g. a picked_window set on an item that no changed robot holds, is not
+    undone; loads restores everything.
+
+    Attributes:
+    ------------
+
+    data: bytes; the checkpoint
+
+    robots: list; the `Robot`s it is restored onto
+
+    items: list; the `Item`s it is restored onto
+    """
+
+
+    def __init__(self, data, robots, items):
+        """
+        Restores the checkpoint `data` onto `robots` and `items` (see loads)
+        and starts a branch from it.
+
+        Parameters:
+        -----------
+
+        data: bytes; a checkpoint returned by dumps
+
+        robots: list; each element is a `Robot`
+
+        items: list; each element is an `Item`
+        """
+        self.data = data
+        self.robots = robots
+        self.items = items
+        # For each robot: its Robot._revision, schedule, and the positions
+        # in `items` of the items of the schedule, as restored
+        self._snapshots = [(robot._revision, schedule, positions)
+                           for robot, (schedule, positions) in zip(robots, _restore(data, robots, items))]
+
+
+    def revert(self):
+        """
+        Restores the robots whose schedule changed since the checkpoint was
+        restored or last reverted to, with the items they held then and now.
+        """
+        changed = [n for n, robot in enumerate(self.robots)
+                   if robot._revision != self._snapshots[n][0]]
+        if not changed:
+            return
+        left, right = _columns(self.data)[4][4:6]
+        # Unschedule the items the changed robots hold now, then put back the
+        # ones they held; an item may have moved from one of them to another
+        for n in changed:
+            for entry in self.robots[n]._items_picked:
+                if not entry.is_stop:
+                    entry.picked_window = None
+        for n in changed:
+            robot = self.robots[n]
+            _, schedule, positions = self._snapshots[n]
+            for i, l, r in zip(positions.tolist(), left[positions].tolist(), right[positions].tolist()):
+                self.items[i].picked_window = Interval(l, r)
+            robot.load_items_picked(schedule)
+            self._snapshots[n] = (robot._revision, schedule, positions)
+
+
+def save(filename, robots, items):
+    """
+    Writes the checkpoint of `robots` and `items` to `filename`
+
+    Parameters:
+    -----------
+
+    filename: string; the name of the checkpoint file
+
+    robots, items: see dumps
+    """
+    with open(filename, 'wb') as fid:
+        fid.write(dumps(robots, items))
+
+
+def load(filename, robots, items):
+    """
+    Restores the checkpoint in `filename` onto `robots` and `items`
+
+    Parameters:
+    -----------
+
+    filename: string; the name of the checkpoint file
+
+    robots, items: see loads
+    """
+    with open(filename, 'rb') as fid:
+        loads(fid.read(), robots, items)
+
+
+def _synthetic_state(n_robots, n_items):
+    """
+    Returns (robots, items) with every item scheduled, round robin, on the
+    robots, without running an allocation
+    """
+    from robot import Robot
+    from item import Item
+    robots = [Robot(r, 10, 10 * n_items, [0, 0]) for r in range(n_robots)]
+    items = [Item(i, 'box', 1, [i % 100, i // 100 % 100], 0, 1) for i in range(n_items)]
+    schedules = [[] for _ in robots]
+    for i, item in enumerate(items):
+        item.update_pickup_status(2 * (i // n_robots))
+        schedules[i % n_robots].append(item)
+    for robot, schedule in zip(robots, schedules):
+        robot.load_items_picked(schedule)
+    return robots, items
+
+
+def bench(n_robots, n_items, repeat=3):
+    """
+    Prints save and load times and throughput for a synthetic state of
+    `n_robots` robots and `n_items` items, and the time for a `Branch` to
+    revert a what-if change to one robot's schedule
+
+    Parameters:
+    -----------
+
+    n_robots: int; number of robots
+
+    n_items: int; number of items
+
+    repeat: int; number of timed runs; the best is reported.  Default: 3
+    """
+    robots, items = _synthetic_state(n_robots, n_items)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'state.ckpt')
+        best_save = best_load = best_restore = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            save(filename, robots, items)
+            best_save = min(best_save, time.perf_counter() - start)
+            start = time.perf_counter()
+            with open(filename, 'rb') as fid:
+                data = fid.read()
+            loads(data, robots, items)
+            best_load = min(best_load, time.perf_counter() - start)
+            # Branch: drop the second half of one schedule, then go back
+            branch = Branch(data, robots, items)
+            schedule = robots[0]._items_picked
+            for item in schedule[len(schedule) // 2:]:
+                item.picked_window = None
+            robots[0].load_items_picked(schedule[:len(schedule) // 2])
+            start = time.perf_counter()
+            branch.revert()
+            best_restore = min(best_restore, time.perf_counter() - start)
+        size = os.path.getsize(filename)
+    print(f"{n_items} items, {n_robots} robots, checkpoint {size / 2**20:.1f} MiB")
+    for name, seconds in (('save', best_save), ('load', best_load)):
+        print(f"  {name}: {seconds * 1000:9.1f} ms  {n_items / seconds:12.0f} items/s  "
+              f"{size / 2**20 / seconds:8.1f} MiB/s")
+    print(f"  revert after changing one robot: {best_restore * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark checkpoint save and load.")
+    parser.add_argument('--bench', type=int, default=1000000, metavar='ITEMS',
+                        help="number of items (default: 1000000)")
+    parser.add_argument('--robots', type=int, default=1000, help="number of robots (default: 1000)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs (default: 3)")
+    args = parser.parse_args()
+    bench(args.robots, args.bench, args.repeat)
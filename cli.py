@@ -0,0 +1,304 @@
+# cli.py
+"""
+Command line entry point for running scenarios
+
+Runs one or more room files through the pipeline load -> allocate -> render
+-> output, with the allocation strategy picked from the registry in
+allocation.py, and prints how long each stage took. With --cache, finished
+allocations are stored on disk and a repeated scenario goes straight from
+the cache lookup to the output.
+
+Example:
+    python cli.py room1.txt --strategy simple --no-animate --export
+"""
+
+
+import argparse
+import ast
+import cProfile
+import contextlib
+import io
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+import main
+from allocation import get_strategy, room_params, strategy_names
+from cache import ResultCache, scenario_key
+from instrument import Instrumentation
+from edf import deadline_report
+
+
+class StageTimer:
+    """
+    A StageTimer records the wall-clock time spent in named stages.
+
+    Usage:
+        timer = StageTimer()
+        with timer.stage('parse'):
+            ...
+    """
+
+
+    def __init__(self):
+        """
+        Initializes a StageTimer with no recorded stages
+        """
+        self.timings = {}
+
+
+    def stage(self, name):
+        """
+        Returns a context manager that adds the time spent inside it to the
+        stage called `name`.
+
+        Parameter:
+        -----------
+
+        name: string; the name of the stage
+        """
+        return _Stage(self, name)
+
+
+    def total(self):
+        """
+        Returns the total time (float, seconds) of all recorded stages
+        """
+        return sum(self.timings.values())
+
+
+    def report(self, title):
+        """
+        Returns a multi-line string with one line per stage and the total
+
+        Parameter:
+        -----------
+
+        title: string; the heading of the report
+        """
+        lines = [title]
+        for name, seconds in self.timings.items():
+            lines.append(f"  {name:<10} {seconds:10.4f} s")
+        lines.append(f"  {'total':<10} {self.total():10.4f} s")
+        return "\n".join(lines)
+
+
+class _Stage:
+    """
+    Context manager returned by StageTimer.stage
+    """
+
+
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._start
+        timings = self._timer.timings
+        timings[self._name] = timings.get(self._name, 0.0) + elapsed
+        return False
+
+
+def parse_params(pairs):
+    """
+    Returns a dict of strategy parameters from a list of 'KEY=VALUE' strings.
+    Values are read as Python literals when possible (numbers, tuples, ...),
+    otherwise kept as strings.
+
+    Parameter:
+    -----------
+
+    pairs: list; strings of the form 'KEY=VALUE'
+    """
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition('=')
+        if not sep or not key:
+            raise ValueError(f"Expected KEY=VALUE, got {pair!r}")
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
+
+
+def run_scenario(data_filename, args, params, cache=None):
+    """
+    Runs one room file through the pipeline and returns its StageTimer.
+
+    Parameters:
+    -----------
+
+    data_filename: string; the name of the room file
+
+    args: argparse.Namespace; the parsed command line options
+
+    params: dict; keyword arguments passed on to the allocation strategy
+
+    cache: ResultCache; where finished allocations are looked up and stored,
+    or None.  Default: None
+    """
+    timer = StageTimer()
+    strategy = get_strategy(args.strategy)
+    stem = os.path.splitext(os.path.basename(data_filename))[0]
+
+    cached = None
+    if cache is not None:
+        with timer.stage('cache'):
+            key = scenario_key(data_filename, args.strategy, params)
+            cached = cache.get(key)
+
+    if cached is not None:
+        sim_time, room_size, robots, items, items_remaining = cached
+    else:
+        with timer.stage('parse'):
+            sim_time, room_size, robots, items = main.load_room(data_filename)
+
+        with timer.stage('allocate'):
+            items_remaining = strategy(robots, items, **room_params(strategy, params, room_size))
+
+        if cache is not None:
+            with timer.stage('cache'):
+                cache.put(key, sim_time, room_size, robots, items)
+
+    if args.render == 'window':
+        with timer.stage('render'):
+            main.animate(robots, items, sim_time, room_size)
+    elif args.render == 'video':
+        import render
+        filename = os.path.join(args.out_dir, f"{stem}.{args.video_format}")
+        with timer.stage('render'):
+            if args.workers > 1:
+                with tempfile.TemporaryDirectory() as frame_dir:
+                    paths = render.render_frames(robots, items, sim_time, room_size,
+                                                 frame_dir, args.workers)
+                    render.stitch(paths, filename)
+            else:
+                render.render_video(robots, items, sim_time, room_size, filename)
+    elif args.render == 'frames':
+        import render
+        frame_dir = os.path.join(args.out_dir, f"{stem}_frames")
+        with timer.stage('render'):
+            render.render_frames(robots, items, sim_time, room_size, frame_dir, args.workers)
+
+    with timer.stage('output'):
+        main.output_results(robots, items_remaining)
+        with_deadline, missed, rate = deadline_report(items)
+        if with_deadline:
+            print(f"Deadline misses: {missed} of {with_deadline} items with a due time ({rate:.1%})")
+
+    if args.export:
+        filename = os.path.join(args.out_dir, f"{stem}.json")
+        with timer.stage('export'):
+            main.export_results(robots, items_remaining, filename)
+
+    return timer
+
+
+def build_parser():
+    """
+    Returns the argparse.ArgumentParser for the command line interface
+    """
+    parser = argparse.ArgumentParser(description="Allocate robots to item pick-ups for one or more room files.")
+    parser.add_argument('rooms', nargs='+', help="room files to process, in order")
+    parser.add_argument('--strategy', default='simple', choices=strategy_names(),
+                        help="allocation strategy (default: simple)")
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="extra keyword argument for the strategy; may be repeated")
+    parser.add_argument('--render', default='window', choices=['window', 'video', 'frames', 'none'],
+                        help="animate in a window, write a video file, write PNG frames to "
+                             "<room>_frames/, or skip rendering (default: window)")
+    parser.add_argument('--no-animate', dest='render', action='store_const', const='none',
+                        help="same as --render=none")
+    parser.add_argument('--video-format', default='gif', choices=['gif', 'mp4'],
+                        help="file format for --render=video; mp4 needs ffmpeg (default: gif)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes for --render=frames, and for --render=video when above 1 (default: 1)")
+    parser.add_argument('--export', action='store_true',
+                        help="write the schedule of each room to <room>.json")
+    parser.add_argument('--out-dir', default='.',
+                        help="directory for exported schedules and videos (default: .)")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="reuse finished allocations stored in DIR, keyed by room contents, "
+                             "strategy and parameters")
+    parser.add_argument('--cache-size', type=float, default=256, metavar='MIB',
+                        help="bound on the total size of --cache, least recently used "
+                             "entries are evicted first (default: 256)")
+    parser.add_argument('--profile', action='store_true',
+                        help="run under cProfile and print the most expensive calls")
+    parser.add_argument('--instrument', action='store_true',
+                        help="count and time calls to the Robot and Item hot paths and print a summary")
+    parser.add_argument('--instrument-out', metavar='STEM',
+                        help="with --instrument, also write STEM.prof (pstats) and STEM.folded (flamegraph)")
+    return parser
+
+
+def main_cli(argv=None):
+    """
+    Runs the command line interface with the arguments `argv` (default:
+    sys.argv[1:]). Returns the process exit status.
+
+    Parameter:
+    -----------
+
+    argv: list; the command line arguments, or None
+    """
+    args = build_parser().parse_args(argv)
+    params = parse_params(args.param)
+    if args.render in ('video', 'frames'):
+        # Offscreen backend: no display needed
+        import matplotlib
+        matplotlib.use('Agg')
+        # draw_frame's fixed axis limits make matplotlib warn on every frame
+        logging.getLogger('matplotlib').setLevel(logging.ERROR)
+    if args.export or args.render in ('video', 'frames'):
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    cache = ResultCache(args.cache, int(args.cache_size * 2**20)) if args.cache else None
+    profiler = cProfile.Profile() if args.profile else None
+    instrumentation = Instrumentation() if args.instrument else contextlib.nullcontext()
+    totals = StageTimer()
+    with instrumentation:
+        for data_filename in args.rooms:
+            if profiler is not None:
+                profiler.enable()
+            timer = run_scenario(data_filename, args, params, cache)
+            if profiler is not None:
+                profiler.disable()
+            print(timer.report(f"Stage timings for {data_filename}:"))
+            for name, seconds in timer.timings.items():
+                totals.timings[name] = totals.timings.get(name, 0.0) + seconds
+
+    if len(args.rooms) > 1:
+        print(totals.report(f"Stage timings for all {len(args.rooms)} rooms:"))
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits ({stats['memo_hits']} in memory), "
+              f"{stats['misses']} misses, {stats['evictions']} evictions")
+
+    if profiler is not None:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+        print(stream.getvalue())
+
+    if args.instrument:
+        print(instrumentation.summary())
+        if args.instrument_out:
+            instrumentation.dump_stats(f"{args.instrument_out}.prof")
+            instrumentation.write_folded(f"{args.instrument_out}.folded")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
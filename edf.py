@@ -0,0 +1,206 @@
+# edf.py
+"""
+Earliest-deadline-first allocation for items with release and due times
+
+Robots are dispatched in the order in which they become free. Items enter a
+heap of pending deadlines once they are released, and a free robot takes the
+pending item with the earliest due time that it can pick up. Items whose
+deadline can no longer be met by any robot are dropped from the heap. A robot
+that finds nothing to take waits until an item is released that it could
+pick up in time.
+
+Registered as the 'edf' strategy, e.g.
+    python cli.py room.txt --strategy edf --no-animate
+"""
+
+
+from allocation import free_heap, liftable, register_strategy
+from robot import travel_time, travel_times
+import bisect
+import heapq
+import math
+import numpy as np
+
+
+# How many released items are checked against the waiting robots at once
+WAKE_CHUNK = 4096
+
+
+@register_strategy('edf')
+def edf_allocation(robots, items, lookahead=64):
+    """
+    Allocates item pickups to the robots, earliest deadline first. Items
+    without a due time are served after all items with one that is pending.
+
+    Returns: list; a list of remaining `Item`s that did not get picked up.
+
+    Parameters:
+    -----------
+
+    robots: list; non-empty list of unique `Robot` references
+
+    items: list; non-empty list of unique `Item` references
+
+    lookahead: int; how many of the most urgent pending items that a free
+    robot could lift it tries before it waits for a release. Once every item
+    is released, a robot tries all of them before it is retired.
+    Default: 64
+    """
+    order = sorted((i for i, ok in enumerate(liftable(robots, items)) if ok),
+                   key=lambda i: items[i].release_time)
+    released = 0
+    # One heap of (due time, index) per robot capacity, holding the items
+    # that need that capacity but no more, so a robot never sees the items
+    # that are too heavy for it
+    capacities = sorted({robot._max_weight for robot in robots})
+    pending = [[] for _ in capacities]
+
+    # When and where every robot is free, for the arithmetic checks below.
+    # Robot.pick builds the whole travel path, so it is only called for items
+    # that pass them. A retired robot will not pick anything any more.
+    free_at = np.array([robot.total_operation_time() for robot in robots], dtype=float)
+    rest = np.array([robot.latest_resting_loc() for robot in robots], dtype=float)
+    capacity = np.array([robot._max_weight for robot in robots], dtype=float)
+    total_time = np.array([robot._total_time for robot in robots], dtype=float)
+    retired = np.zeros(len(robots), dtype=bool)
+    # Robots that found nothing to take, until a release brings them an item
+    # that passes their arithmetic check
+    waiting = np.zeros(len(robots), dtype=bool)
+
+    def feasible(robot_ids, new_items):
+        # Which of the robots, leaving when they are next free, could pick up
+        # any of the items by its due time and within their shift? The items
+        # go in chunks to bound the size of the (robots, items) arrays.
+        found = np.zeros(len(robot_ids), dtype=bool)
+        for start in range(0, len(new_items), WAKE_CHUNK):
+            chunk = new_items[start:start + WAKE_CHUNK]
+            loc = np.array([item.loc for item in chunk], dtype=float)
+            release = np.array([item.release_time for item in chunk], dtype=float)
+            duration = np.array([item.duration for item in chunk], dtype=float)
+            weight = np.array([item.weight for item in chunk], dtype=float)
+            due = np.array([math.inf if item.due_time is None else item.due_time
+                            for item in chunk], dtype=float)
+            arrival = free_at[robot_ids, None] + np.abs(
+                rest[robot_ids, None, :].astype(int) - loc.astype(int)).sum(axis=2)
+            finish = np.maximum(arrival, release) + duration
+            ok = (finish <= np.minimum(total_time[robot_ids, None], due)) \
+                & (capacity[robot_ids, None] >= weight)
+            found |= ok.any(axis=1)
+        return found
+
+    # For every item found reachable, a robot that could take it and when
+    # that robot was free then. It stays a witness until it picks up
+    # something else, which saves most of the checks in reachable()
+    witness = {}
+
+    def reachable(i):
+        # Can any robot still in service, leaving when it is next free, pick
+        # the item up by its due time and within its shift?
+        item = items[i]
+        m, free_time = witness.get(i, (None, None))
+        if m is not None and free_at[m] == free_time and not retired[m]:
+            return True
+        arrival = free_at + travel_times(rest, item.loc)
+        finish = np.maximum(arrival, item.release_time) + item.duration
+        deadline = total_time if item.due_time is None else np.minimum(total_time, item.due_time)
+        ok = (finish <= deadline) & (capacity >= item.weight) & ~retired
+        m = int(ok.argmax())
+        if not ok[m]:
+            return False
+        witness[i] = m, free_at[m]
+        return True
+
+    # Robots are dispatched as they become free; an entry with position -1
+    # releases the items due at that time, before any robot free then
+    free = free_heap(robots)
+    if order:
+        heapq.heappush(free, (items[order[0]].release_time, -1))
+
+    while free:
+        now, n = heapq.heappop(free)
+
+        if n == -1:
+            new_items = []
+            while released < len(order) and items[order[released]].release_time <= now:
+                i = order[released]
+                item = items[i]
+                due_time = math.inf if item.due_time is None else item.due_time
+                heapq.heappush(pending[bisect.bisect_left(capacities, item.weight)], (due_time, i))
+                new_items.append(item)
+                released += 1
+            if released < len(order):
+                heapq.heappush(free, (items[order[released]].release_time, -1))
+                # Wake the waiting robots that could take one of the new items
+                wake = np.flatnonzero(waiting)
+                wake = wake[feasible(wake, new_items)] if len(wake) else wake
+            else:
+                # Every item is released: waiting robots make their last try
+                wake = np.flatnonzero(waiting)
+            waiting[wake] = False
+            for m in wake:
+                heapq.heappush(free, (now, int(m)))
+            continue
+
+        robot = robots[n]
+        departure_time = robot.total_operation_time()
+        rest_loc = robot.latest_resting_loc()
+        heaps = pending[:bisect.bisect_left(capacities, robot._max_weight) + 1]
+
+        skipped = []
+        tried = 0
+        picked = False
+        while tried < lookahead or released == len(order):
+            heap = None
+            for candidate in heaps:
+                if candidate and (heap is None or candidate[0] < heap[0]):
+                    heap = candidate
+            if heap is None:
+                break
+            due_time, i = entry = heapq.heappop(heap)
+            item = items[i]
+            tried += 1
+            # The earliest this robot could finish, as in Robot.pick. It only
+            # gets later, so the robot will never take an item that fails
+            if max(departure_time + travel_time(rest_loc, item.loc), item.release_time) \
+                    + item.duration > min(due_time, robot._total_time):
+                # Drop the item if no robot can make it any more
+                if reachable(i):
+                    skipped.append((heap, entry))
+                continue
+            if robot.pick(item, do_pick=True, num_arms=0):
+                picked = True
+                break
+            skipped.append((heap, entry))
+        for heap, entry in skipped:
+            heapq.heappush(heap, entry)
+
+        if picked:
+            free_at[n] = robot.total_operation_time()
+            rest[n] = robot.latest_resting_loc()
+            heapq.heappush(free, (robot.total_operation_time(), n))
+        elif released < len(order):
+            # Nothing this robot can take yet; wait for a release it can use
+            waiting[n] = True
+        else:
+            # Every pending item was tried
+            retired[n] = True
+
+    return [item for item in items if item.picked_window is None]
+
+
+def deadline_report(items):
+    """
+    Returns (number of items with a due time, number of those not picked up
+    by their due time, miss rate). The miss rate is 0.0 when no item has a
+    due time.
+
+    Parameter:
+    -----------
+
+    items: list; all the `Item`s of the room, after allocation
+    """
+    with_deadline = [item for item in items if item.due_time is not None]
+    missed = sum(1 for item in with_deadline
+                 if item.picked_window is None or item.picked_window.right > item.due_time)
+    rate = missed / len(with_deadline) if with_deadline else 0.0
+    return len(with_deadline), missed, rate
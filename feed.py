@@ -0,0 +1,322 @@
+# feed.py
+"""
+Live position feed: an asyncio server that streams robot positions and item
+pick events to any number of subscribers while a simulation advances
+
+Messages are compact JSON objects, one per line (newline-delimited JSON):
+
+    {"type":"snapshot","t":3,"robots":{"1":[5,4]},"picked":[4]}
+    {"type":"delta","t":4,"robots":{"1":[5,5]},"events":[{"event":"start","item":4,"robot":1}]}
+    {"type":"end","t":20}
+
+A subscriber first receives a snapshot of the full state, then only deltas:
+the robots that moved and the pick events of each timestep. Each subscriber
+has a bounded queue; publishing never waits on a subscriber. When a
+subscriber's queue overflows, its backlog is dropped and replaced by a fresh
+snapshot, so slow consumers skip ahead instead of stalling the simulation.
+The "picked" list of such a resync snapshot only holds the items picked
+since the last line the subscriber received, so a resync costs as much as
+the backlog it replaces, not as much as the whole run.
+
+Example:
+    python feed.py room1.txt --port 8765 --tick 0.5
+    nc localhost 8765
+"""
+
+
+import argparse
+import asyncio
+import json
+
+from main import load_room
+from allocation import get_strategy, room_params, strategy_names
+
+
+def _encode(message):
+    """
+    Returns `message` (dict) as a compact JSON line (bytes)
+    """
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+def pick_events(robots):
+    """
+    Returns a dict mapping a timestep to the list of pick events that happen
+    at it: 'start' when a robot begins picking an item (the left end of its
+    `picked_window`) and 'picked' when the item is fully picked up (the right
+    end). Stops give an event named after their kind when they begin, with
+    an item of None: 'drop_off' when a robot in carrying mode starts
+    unloading at the depot, 'idle' when a robot goes out of service.
+
+    Parameter:
+    -----------
+
+    robots: list; each element is a `Robot` whose allocation is complete
+    """
+    events = {}
+    for robot in robots:
+        for item in robot.get_items_picked():
+            window = item.picked_window
+            if item.is_stop:
+                events.setdefault(window.left, []).append(
+                    {'event': item.kind, 'item': None, 'robot': robot.get_id()})
+                continue
+            events.setdefault(window.left, []).append(
+                {'event': 'start', 'item': item.id_, 'robot': robot.get_id()})
+            events.setdefault(window.right, []).append(
+                {'event': 'picked', 'item': item.id_, 'robot': robot.get_id()})
+    return events
+
+
+class _Subscriber:
+    """
+    A connected client: its stream writer, its queue of pending (line,
+    number of items picked as of the line) pairs, and how many items were
+    picked as of the last line taken from the queue
+    """
+
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(max(queue_size, 2))
+        self.resyncs = 0
+        self.picked_sent = 0
+        self.task = asyncio.current_task()
+
+
+class FeedServer:
+    """
+    A FeedServer keeps the latest published state of the simulation and fans
+    each update out to its subscribers.
+
+    Attributes:
+    ------------
+
+    t: int; the most recently published timestep, or None
+
+    positions: dict; robot id -> latest location
+
+    picked: list; ids of the items fully picked up so far
+    """
+
+
+    def __init__(self, queue_size=256):
+        """
+        Initializes a FeedServer with no subscribers
+
+        Parameter:
+        -----------
+
+        queue_size: int; number of lines buffered per subscriber before its
+        backlog is replaced by a snapshot.  Default: 256
+        """
+        self._queue_size = queue_size
+        self._subscribers = set()
+        self._server = None
+        self.t = None
+        self.positions = {}
+        self.picked = []
+
+
+    async def start_tcp(self, host='127.0.0.1', port=8765):
+        """
+        Starts listening on a TCP socket
+
+        Parameters:
+        -----------
+
+        host: string; address to bind.  Default: '127.0.0.1'
+
+        port: int; port to bind, 0 for any free port.  Default: 8765
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+
+    async def start_unix(self, path):
+        """
+        Starts listening on a Unix domain socket
+
+        Parameter:
+        -----------
+
+        path: string; file name of the socket
+        """
+        self._server = await asyncio.start_unix_server(self._handle, path)
+        return self._server
+
+
+    def snapshot(self, since=0):
+        """
+        Returns the current state as an encoded snapshot line
+
+        Parameter:
+        -----------
+
+        since: int; the snapshot lists the items picked after the first
+        `since` ones.  Default: 0, all of them
+        """
+        return _encode({'type': 'snapshot', 't': self.t,
+                        'robots': self.positions, 'picked': self.picked[since:]})
+
+
+    def publish(self, t, positions, events=()):
+        """
+        Records the state at timestep `t` and queues a delta line for every
+        subscriber. Never blocks.
+
+        Parameters:
+        -----------
+
+        t: int; the timestep
+
+        positions: dict; robot id -> location at `t`
+
+        events: list; pick events (dicts) that happen at `t`
+        """
+        moved = {}
+        for robot_id, loc in positions.items():
+            if self.positions.get(robot_id) != loc:
+                moved[robot_id] = loc
+        self.positions.update(moved)
+        self.picked.extend(event['item'] for event in events if event['event'] == 'picked')
+        self.t = t
+        self._broadcast(_encode({'type': 'delta', 't': t, 'robots': moved, 'events': list(events)}))
+
+
+    def finish(self):
+        """
+        Queues an end-of-stream line for every subscriber
+        """
+        self._broadcast(_encode({'type': 'end', 't': self.t}), final=True)
+
+
+    def _broadcast(self, line, final=False):
+        """
+        Offers `line` to every subscriber; a subscriber whose queue is full
+        has its backlog replaced by a snapshot of the current state, which
+        already includes `line`, with the items picked since the last line it
+        received. A `final` line is always delivered.
+        """
+        n_picked = len(self.picked)
+        for subscriber in self._subscribers:
+            try:
+                subscriber.queue.put_nowait((line, n_picked))
+            except asyncio.QueueFull:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait((self.snapshot(subscriber.picked_sent), n_picked))
+                subscriber.resyncs += 1
+                if final:
+                    subscriber.queue.put_nowait((line, n_picked))
+
+
+    async def _handle(self, reader, writer):
+        """
+        Serves one subscriber until it disconnects or the stream ends
+        """
+        subscriber = _Subscriber(writer, self._queue_size)
+        subscriber.queue.put_nowait((self.snapshot(), len(self.picked)))
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                line, subscriber.picked_sent = await subscriber.queue.get()
+                writer.write(line)
+                await writer.drain()
+                if line.startswith(b'{"type":"end"'):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._subscribers.discard(subscriber)
+            writer.close()
+
+
+    async def close(self):
+        """
+        Disconnects the remaining subscribers, stops accepting new ones and
+        waits for the server to close
+        """
+        for subscriber in list(self._subscribers):
+            subscriber.task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def simulate(server, robots, sim_time, tick=0.1):
+    """
+    Advances the simulation from timestep 0 to `sim_time`, publishing the
+    robot positions (from `Robot.get_location`) and pick events of each
+    timestep to `server`, then publishes the end of the stream.
+
+    Parameters:
+    -----------
+
+    server: FeedServer; where updates are published
+
+    robots: list; each element is a `Robot` whose allocation is complete
+
+    sim_time: int; number of timesteps
+
+    tick: float; seconds between timesteps.  Default: 0.1
+    """
+    events = pick_events(robots)
+    for t in range(0, sim_time + 1):
+        positions = {robot.get_id(): robot.get_location(t) for robot in robots}
+        server.publish(t, positions, events.get(t, ()))
+        await asyncio.sleep(tick)
+    server.finish()
+
+
+async def serve_room(data_filename, strategy='simple', host='127.0.0.1', port=8765,
+                     unix_path=None, tick=0.1, wait=0.0):
+    """
+    Loads and allocates a room, then serves its simulation on a TCP socket
+    (or on a Unix socket if `unix_path` is given).
+
+    Parameters:
+    -----------
+
+    data_filename: string; the room file
+
+    strategy: string; name of the allocation strategy.  Default: 'simple'
+
+    host, port: TCP address to listen on
+
+    unix_path: string; Unix socket file name, or None for TCP
+
+    tick: float; seconds between timesteps.  Default: 0.1
+
+    wait: float; seconds to wait for subscribers before starting.  Default: 0
+    """
+    sim_time, room_size, robots, items = load_room(data_filename)
+    allocate = get_strategy(strategy)
+    allocate(robots, items, **room_params(allocate, {}, room_size))
+
+    server = FeedServer()
+    if unix_path is not None:
+        await server.start_unix(unix_path)
+    else:
+        await server.start_tcp(host, port)
+    await asyncio.sleep(wait)
+    await simulate(server, robots, sim_time, tick)
+    # Give subscribers a moment to receive the end of the stream
+    await asyncio.sleep(max(tick, 0.1))
+    await server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a live robot position feed.")
+    parser.add_argument('room', help="room file to simulate")
+    parser.add_argument('--strategy', default='simple', choices=strategy_names(),
+                        help="allocation strategy (default: simple)")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--tick', type=float, default=0.1, help="seconds per timestep (default: 0.1)")
+    parser.add_argument('--wait', type=float, default=0.0,
+                        help="seconds to wait for subscribers before starting (default: 0)")
+    args = parser.parse_args()
+    asyncio.run(serve_room(args.room, args.strategy, args.host, args.port,
+                           args.unix, args.tick, args.wait))
@@ -0,0 +1,208 @@
+# generate.py
+"""
+Seeded generator of synthetic room files for scale testing
+
+Room files are written in the same format that main.load_room reads:
+
+    sim_time, width, height
+    Depot, [x,y]            (only with a depot)
+    Robot, id, max_weight, [x,y]
+    Item, id, name, weight, [x,y], arm_requirement, duration[, release, due]
+
+Lines are produced by a generator and written in batches, so even rooms with
+millions of items are never held in memory.
+
+Example:
+    python generate.py big.txt --robots 1000 --items 1000000 --distribution clustered
+"""
+
+
+import argparse
+import random
+import sys
+
+
+DISTRIBUTIONS = ('uniform', 'clustered', 'aisle')
+
+# Each profile gives: item weight range, arm requirement choices with their
+# relative frequencies, pick-up duration range and robot max weight range.
+# Robot lines carry no arms and every strategy picks with num_arms=0, so an
+# item that needs arms can never be picked up. The profiles keep only a small
+# share of them (2-5%) to exercise the "not able to pick up" path.
+PROFILES = {
+    'light': {'weight': (0.1, 5), 'arms': ((0, 1), (49, 1)),
+              'duration': (1, 2), 'max_weight': (5, 10)},
+    'mixed': {'weight': (0.1, 20), 'arms': ((0, 1, 2), (38, 1, 1)),
+              'duration': (1, 4), 'max_weight': (4, 20)},
+    'heavy': {'weight': (5, 50), 'arms': ((0, 1, 2), (19, 0.5, 0.5)),
+              'duration': (2, 6), 'max_weight': (20, 60)},
+}
+
+NAMES = ('apples', 'rubber duck', 'paperclip', 'cat', 'hockey puck',
+         'basket', 'table', 'pen', 'notebook', 'box')
+
+BATCH_LINES = 10000
+
+
+def room_lines(n_robots, n_items, width, height, sim_time,
+               distribution='uniform', profile='mixed', seed=0, clusters=8, aisle_spacing=4,
+               windows=0.0, depot=None):
+    """
+    Yields the lines (strings ending in a newline) of a synthetic room file.
+
+    Parameters:
+    -----------
+
+    n_robots: int; number of robots
+
+    n_items: int; number of items
+
+    width: int; horizontal dimension of the room
+
+    height: int; vertical dimension of the room
+
+    sim_time: int; number of timesteps of the simulation
+
+    distribution: string; how item locations are drawn, one of 'uniform',
+    'clustered' (around a few random centers) or 'aisle' (on evenly spaced
+    vertical aisles).  Default: 'uniform'
+
+    profile: string; weight and arm-requirement profile, one of the keys of
+    `PROFILES`.  Default: 'mixed'
+
+    seed: int; seed of the random number generator.  Default: 0
+
+    clusters: int; number of cluster centers for 'clustered'.  Default: 8
+
+    aisle_spacing: int; distance between aisles for 'aisle'.  Default: 4
+
+    windows: float; fraction of items that get a release time and a due time.
+    Releases fall in the first half of the simulation; the due time leaves
+    up to a quarter of the simulation of slack.  Default: 0.0
+
+    depot: length-2 sequence; location of a depot for carrying mode, or None
+    for no depot.  Default: None
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution {distribution!r}")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}")
+    rng = random.Random(seed)
+    spec = PROFILES[profile]
+
+    yield f"{sim_time}, {width}, {height}\n"
+    if depot is not None:
+        yield f"Depot, [{depot[0]},{depot[1]}]\n"
+
+    lo, hi = spec['max_weight']
+    for robot_id in range(1, n_robots + 1):
+        x = rng.randint(0, width)
+        y = rng.randint(0, height)
+        yield f"Robot, {robot_id}, {rng.randint(lo, hi)}, [{x},{y}]\n"
+
+    locate = _locator(rng, distribution, width, height, clusters, aisle_spacing)
+    w_lo, w_hi = spec['weight']
+    arm_values, arm_freqs = spec['arms']
+    d_lo, d_hi = spec['duration']
+    for item_id in range(1, n_items + 1):
+        x, y = locate()
+        name = NAMES[item_id % len(NAMES)]
+        weight = round(rng.uniform(w_lo, w_hi), 2)
+        arms = rng.choices(arm_values, arm_freqs)[0]
+        duration = rng.randint(d_lo, d_hi)
+        if windows and rng.random() < windows:
+            release = rng.randint(0, sim_time // 2)
+            due = release + duration + rng.randint(0, sim_time // 4)
+            yield f"Item, {item_id}, {name}, {weight}, [{x},{y}], {arms}, {duration}, {release}, {due}\n"
+        else:
+            yield f"Item, {item_id}, {name}, {weight}, [{x},{y}], {arms}, {duration}\n"
+
+
+def _locator(rng, distribution, width, height, clusters, aisle_spacing):
+    """
+    Returns a function of no arguments that draws one integer item location
+    (x, y) inside the room according to `distribution`.
+    """
+    if distribution == 'uniform':
+        def locate():
+            return rng.randint(0, width), rng.randint(0, height)
+
+    elif distribution == 'clustered':
+        centers = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(clusters)]
+        sigma = max(min(width, height) / 20, 1)
+
+        def locate():
+            cx, cy = rng.choice(centers)
+            x = min(max(round(rng.gauss(cx, sigma)), 0), width)
+            y = min(max(round(rng.gauss(cy, sigma)), 0), height)
+            return x, y
+
+    else:
+        aisles = list(range(0, width + 1, aisle_spacing))
+
+        def locate():
+            return rng.choice(aisles), rng.randint(0, height)
+
+    return locate
+
+
+def write_room(filename, n_robots, n_items, width, height, sim_time, **options):
+    """
+    Writes a synthetic room file to `filename`, streaming the lines from
+    room_lines in batches. Accepts the same keyword options as room_lines.
+
+    Parameters:
+    -----------
+
+    filename: string; the name of the room file to write
+
+    n_robots, n_items, width, height, sim_time: see room_lines
+    """
+    lines = room_lines(n_robots, n_items, width, height, sim_time, **options)
+    with open(filename, 'w') as fid:
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == BATCH_LINES:
+                fid.write(''.join(batch))
+                batch.clear()
+        fid.write(''.join(batch))
+
+
+def build_parser():
+    """
+    Returns the argparse.ArgumentParser for the command line interface
+    """
+    parser = argparse.ArgumentParser(description="Write a synthetic room file.")
+    parser.add_argument('filename', help="room file to write ('-' for standard output)")
+    parser.add_argument('--robots', type=int, default=10, help="number of robots (default: 10)")
+    parser.add_argument('--items', type=int, default=100, help="number of items (default: 100)")
+    parser.add_argument('--width', type=int, default=100, help="room width (default: 100)")
+    parser.add_argument('--height', type=int, default=100, help="room height (default: 100)")
+    parser.add_argument('--sim-time', type=int, default=1000, help="number of timesteps (default: 1000)")
+    parser.add_argument('--distribution', default='uniform', choices=DISTRIBUTIONS,
+                        help="item location distribution (default: uniform)")
+    parser.add_argument('--profile', default='mixed', choices=sorted(PROFILES),
+                        help="item weight and arm requirement profile (default: mixed)")
+    parser.add_argument('--clusters', type=int, default=8, help="cluster count for --distribution=clustered")
+    parser.add_argument('--aisle-spacing', type=int, default=4, help="aisle spacing for --distribution=aisle")
+    parser.add_argument('--windows', type=float, default=0.0,
+                        help="fraction of items with release and due times (default: 0)")
+    parser.add_argument('--depot', default=None,
+                        help="depot location X,Y for carrying mode (default: no depot)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    options = dict(distribution=args.distribution, profile=args.profile, seed=args.seed,
+                   clusters=args.clusters, aisle_spacing=args.aisle_spacing, windows=args.windows)
+    if args.depot is not None:
+        options['depot'] = [int(value) for value in args.depot.split(',')]
+    if args.filename == '-':
+        sys.stdout.writelines(room_lines(args.robots, args.items, args.width, args.height,
+                                         args.sim_time, **options))
+    else:
+        write_room(args.filename, args.robots, args.items, args.width, args.height,
+                   args.sim_time, **options)
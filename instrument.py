@@ -0,0 +1,210 @@
+# instrument.py
+"""
+Opt-in call counting and timing for the hot paths of the simulation
+
+Instrumentation wraps the methods listed in `TARGETS` only while it is
+active, so the code runs unmodified (and at full speed) otherwise:
+
+    with Instrumentation() as inst:
+        items_remaining = simple_allocation(robots, items)
+    print(inst.summary())
+    inst.dump_stats('run.prof')      # readable by pstats, snakeviz, gprof2dot
+    inst.write_folded('run.folded')  # input for flamegraph.pl / speedscope
+
+Times are wall-clock. The self time of a call excludes time spent in other
+instrumented calls made from inside it.
+"""
+
+
+import importlib
+import marshal
+import time
+
+
+# (module, attribute path) of every function that is wrapped. Functions that
+# another module imported by name are listed under that module as well.
+TARGETS = (
+    ('robot', 'Robot.pick'),
+    ('robot', 'Robot.travel_steps'),
+    ('robot', 'Robot.get_location'),
+    ('robot', 'Robot.get_items_picked'),
+    ('robot', 'Robot.draw'),
+    ('item', 'Item.valid_pickup'),
+    ('item', 'Item.draw'),
+    ('shapes', 'draw_rect'),
+    ('shapes', 'draw_disk'),
+    ('item', 'draw_rect'),
+    ('robot', 'draw_disk'),
+)
+
+_active = None
+
+
+class Instrumentation:
+    """
+    An Instrumentation counts and times calls to a set of target functions
+    while it is used as a context manager.
+
+    Attributes:
+    ------------
+
+    calls: dict; maps a function label (e.g. 'Robot.pick') to a list
+    [number of calls, total time, self time]
+    """
+
+
+    def __init__(self, targets=TARGETS):
+        """
+        Initializes an Instrumentation object; nothing is wrapped until the
+        context is entered.
+
+        Parameter:
+        -----------
+
+        targets: tuple; (module name, attribute path) pairs.  Default: TARGETS
+        """
+        self._targets = targets
+        self._originals = []
+        self._keys = {}
+        self._stack = []
+        self.calls = {}
+        self._edges = {}
+        self._folded = {}
+
+
+    def __enter__(self):
+        """
+        Installs the wrappers. Raises RuntimeError if another Instrumentation
+        is already active.
+        """
+        global _active
+        if _active is not None:
+            raise RuntimeError("An Instrumentation is already active")
+        _active = self
+        wrappers = {}
+        for module_name, path in self._targets:
+            module = importlib.import_module(module_name)
+            owner_path, _, attr = path.rpartition('.')
+            owner = module
+            for part in filter(None, owner_path.split('.')):
+                owner = getattr(owner, part)
+            func = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+            # The same function imported into several modules gets one wrapper
+            if func not in wrappers:
+                wrappers[func] = self._wrap(func)
+            self._originals.append((owner, attr, func))
+            setattr(owner, attr, wrappers[func])
+        return self
+
+
+    def __exit__(self, *exc_info):
+        """
+        Restores the original functions
+        """
+        global _active
+        for owner, attr, func in reversed(self._originals):
+            setattr(owner, attr, func)
+        self._originals.clear()
+        _active = None
+        return False
+
+
+    def _wrap(self, func):
+        """
+        Returns a function that calls `func` and records the call
+        """
+        label = func.__qualname__
+        code = func.__code__
+        self._keys[label] = (code.co_filename, code.co_firstlineno, code.co_name)
+        stack = self._stack
+        record = self._record
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            # Each stack entry is [label, time spent in instrumented callees]
+            stack.append([label, 0.0])
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(perf_counter() - start)
+
+        wrapper.__wrapped__ = func
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = label
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+
+    def _record(self, elapsed):
+        """
+        Pops the innermost call off the stack and adds its timings
+        """
+        path = tuple(entry[0] for entry in self._stack)
+        label, child_time = self._stack.pop()
+        self_time = elapsed - child_time
+
+        stats = self.calls.setdefault(label, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += self_time
+        self._folded[path] = self._folded.get(path, 0.0) + self_time
+
+        caller = self._stack[-1][0] if self._stack else None
+        edge = self._edges.setdefault((caller, label), [0, 0.0, 0.0])
+        edge[0] += 1
+        edge[1] += self_time
+        edge[2] += elapsed
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+
+    def summary(self):
+        """
+        Returns a table (string) of calls, total time, self time and time per
+        call for every instrumented function that was called, most expensive
+        self time first.
+        """
+        lines = [f"{'function':<28}{'calls':>12}{'total s':>12}{'self s':>12}{'per call us':>14}"]
+        rows = sorted(self.calls.items(), key=lambda row: row[1][2], reverse=True)
+        for label, (count, total, self_time) in rows:
+            lines.append(f"{label:<28}{count:>12}{total:>12.4f}{self_time:>12.4f}"
+                         f"{total / count * 1e6:>14.2f}")
+        return "\n".join(lines)
+
+
+    def dump_stats(self, filename):
+        """
+        Writes the recorded calls to `filename` in the format of
+        cProfile.Profile.dump_stats, so it can be loaded with pstats.Stats.
+
+        Parameter:
+        -----------
+
+        filename: string; the name of the file to write
+        """
+        stats = {}
+        for label, (count, total, self_time) in self.calls.items():
+            callers = {}
+            for (caller, callee), (n, tt, ct) in self._edges.items():
+                if callee == label and caller is not None:
+                    callers[self._keys[caller]] = (n, n, tt, ct)
+            stats[self._keys[label]] = (count, count, self_time, total, callers)
+        with open(filename, 'wb') as fid:
+            marshal.dump(stats, fid)
+
+
+    def write_folded(self, filename):
+        """
+        Writes the recorded calls to `filename` in the folded-stack format used
+        by flamegraph.pl and speedscope: one line per call stack with its
+        self time in microseconds.
+
+        Parameter:
+        -----------
+
+        filename: string; the name of the file to write
+        """
+        with open(filename, 'w') as fid:
+            for path, self_time in self._folded.items():
+                fid.write(f"{';'.join(path)} {round(self_time * 1e6)}\n")
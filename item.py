@@ -3,18 +3,23 @@
 
 from interval import Interval
 from shapes import draw_rect
-import matplotlib.pyplot as plt
+import math
 
 
 class Item:
     """
     An Item has an id_, a name, a weight, a location, the number of arms 
-    required to lift it, the amount of time required to pick it up, and 
-    a time window when pick-up is scheduled.
+    required to lift it, the amount of time required to pick it up, 
+    optionally a release time and a due time, and a time window when pick-up
+    is scheduled.
     """
 
+    # True for stops in a robot's schedule that are not items to pick (see DropOff)
+    is_stop = False
 
-    def __init__(self, id_, name, weight, loc, arm_requirement, duration):
+
+    def __init__(self, id_, name, weight, loc, arm_requirement, duration,
+                 release_time=0, due_time=None):
         """
         Initializes an Item object
         
@@ -33,6 +38,12 @@ class Item:
         arm_requirement: Number of arms required to pick up the item, an int
         
         duration: Time units necessary to fully pick up the item, an int
+
+        release_time: Earliest time at which pick-up may begin, an int.
+        Default: 0
+
+        due_time: Time by which pick-up must be complete, an int, or None if
+        the item has no deadline.  Default: None
         """
         self.id_ = id_
         self.name = name
@@ -40,7 +51,19 @@ class Item:
         self.loc = loc
         self.arm_requirement = arm_requirement
         self.duration = duration
+        self.release_time = release_time
+        self.due_time = due_time
         self.picked_window = None
+
+
+    def available_window(self):
+        """
+        Returns an Interval from the item's release time to its due time (or
+        to infinity if the item has no deadline). A pick-up window must lie
+        inside it.
+        """
+        due_time = math.inf if self.due_time is None else self.due_time
+        return Interval(self.release_time, due_time)
         
 
     def valid_pickup(self, max_load, num_arms):
@@ -117,6 +140,8 @@ class Item:
 
         # Draw the item if needed
         if should_draw:
+            # Imported here so that the scheduling code never loads matplotlib
+            import matplotlib.pyplot as plt
             # Calculate the lower left corner of the rectangle
             # Rectangle has side length 1 and is centered at the item's location
             lower_left_x = self.loc[0] - 0.5
@@ -125,5 +150,96 @@ class Item:
             draw_rect(lower_left_x, lower_left_y, 1, 1, 'r')
             # Add the item's id as text at the center
             plt.text(self.loc[0], self.loc[1], str(self.id_), horizontalalignment="center")
-        
 
+
+class DropOff(Item):
+    """
+    A DropOff is a stop at the depot where a robot in carrying mode unloads
+    everything it carries. It sits in the robot's list of picked items like an
+    Item, so that the robot's location and operation time account for it, but
+    it is not an item of the room and is never drawn.
+    """
+
+    is_stop = True
+    kind = 'drop_off'
+
+
+    def __init__(self, loc, unload_time):
+        """
+        Initializes a DropOff object
+
+        Parameters:
+        -----------
+
+        loc: Location of the depot, a list of length 2
+
+        unload_time: Time units necessary to unload, an int
+        """
+        super().__init__(None, 'depot drop-off', 0, loc, 0, unload_time)
+
+
+    def describe(self):
+        """
+        Returns a one-line description of the stop for the printed results
+        """
+        return (f"Depot drop-off: arrived at time {self.picked_window.left}, "
+                f"unloaded at time {self.picked_window.right}")
+
+
+    def as_dict(self):
+        """
+        Returns the stop as a dict for the exported results
+        """
+        return {"drop_off": True, "arrived": self.picked_window.left,
+                "unloaded": self.picked_window.right}
+
+
+    def draw(self, t):
+        """
+        Draws nothing: the depot is not an item.
+        """
+
+
+class Idle(Item):
+    """
+    An Idle is a stop where a robot stays put without picking anything, e.g.
+    while it is out of service (see repair.py). Like a DropOff it sits in the
+    robot's list of picked items and is never drawn.
+    """
+
+    is_stop = True
+    kind = 'idle'
+
+
+    def __init__(self, loc, duration):
+        """
+        Initializes an Idle object
+
+        Parameters:
+        -----------
+
+        loc: Location where the robot stays, a list of length 2
+
+        duration: Time units the robot stays there, an int
+        """
+        super().__init__(None, 'idle', 0, loc, 0, duration)
+
+
+    def describe(self):
+        """
+        Returns a one-line description of the stop for the printed results
+        """
+        return f"Idle from time {self.picked_window.left} to time {self.picked_window.right}"
+
+
+    def as_dict(self):
+        """
+        Returns the stop as a dict for the exported results
+        """
+        return {"idle": True, "from": self.picked_window.left, "until": self.picked_window.right}
+
+
+    def draw(self, t):
+        """
+        Draws nothing: the robot is drawn where it stays.
+        """
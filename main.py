@@ -4,8 +4,8 @@
 
 from robot import Robot
 from item import Item
-import numpy as np
-import matplotlib.pyplot as plt
+from allocation import register_strategy
+import json
 
 
 def run_robots(data_filename):
@@ -17,6 +17,33 @@ def run_robots(data_filename):
     Parameter:
     -----------
     
+    data_filename: string; the name of the data file.
+    """
+    sim_time, room_size, robots, items = load_room(data_filename)
+
+    # Do a task allocation
+    items_remaining = simple_allocation(robots, items)
+
+    # Animate the simulation
+    animate(robots, items, sim_time, room_size)
+
+    # Print descriptive output
+    output_results(robots, items_remaining)
+
+
+def load_room(data_filename):
+    """
+    Reads a data file in the necessary format and returns a tuple
+    (sim_time, room_size, robots, items): the number of timesteps (int), the
+    dimensions of the room (length-2 list), a list of `Robot`s and a list of
+    `Item`s.
+
+    If the file has a Depot line (Depot, [x, y][, unload_time]), every robot
+    is put in carrying mode with that depot.
+
+    Parameter:
+    -----------
+
     data_filename: string; the name of the data file.
     """
     with open(data_filename, 'r') as fid:
@@ -26,7 +53,7 @@ def run_robots(data_filename):
         sim_time = int(sim_info[0])
         horiz_dim = float(sim_info[1])
         vert_dim = float(sim_info[2])
-        room_size = np.array([horiz_dim, vert_dim])
+        room_size = [horiz_dim, vert_dim]
 
         # Process the remaining lines of the file
         
@@ -37,6 +64,7 @@ def run_robots(data_filename):
 
         robots = []  # list of robots
         items = []   # list of items
+        depot = None
         for line in fid:
             # `line` is a string, the next line of text in the file
             # Split `line` into a list of strings, with comma as separator
@@ -44,53 +72,99 @@ def run_robots(data_filename):
 
             # Check if this line is for a Robot or an Item
             if tokens[0].strip() == 'Robot':
-                # Parse robot data: Robot, ID, max_weight, [x, y]
-                # Format: Robot, 1, 4, [4,4]
-                # After splitting by comma: ['Robot', ' 1', ' 4', ' [4', '4]']
-                robot_id = int(tokens[1].strip())
-                max_weight = float(tokens[2].strip())
-                # Parse the location which is split across tokens[3] and tokens[4]
-                # tokens[3] contains '[x' and tokens[4] contains 'y]'
-                x_str = tokens[3].strip().replace('[', '')
-                y_str = tokens[4].strip().replace(']', '')
-                init_loc = [float(x_str), float(y_str)]
-                # Create a Robot object and add to the robots list
-                robot = Robot(robot_id, max_weight, sim_time, init_loc)
-                robots.append(robot)
-
+                robots.append(parse_robot(tokens, sim_time))
             elif tokens[0].strip() == 'Item':
-                # Parse item data: Item, ID, name, weight, [x, y], arms, duration
-                # Format: Item, 1, apples, 12, [3,3], 1, 1
-                # After splitting by comma: ['Item', ' 1', ' apples', ' 12', ' [3', '3]', ' 1', ' 1']
-                item_id = int(tokens[1].strip())
-                name = tokens[2].strip()
-                weight = float(tokens[3].strip())
-                # Parse the location which is split across tokens[4] and tokens[5]
-                # tokens[4] contains '[x' and tokens[5] contains 'y]'
-                x_str = tokens[4].strip().replace('[', '')
-                y_str = tokens[5].strip().replace(']', '')
-                loc = [float(x_str), float(y_str)]
-                # Parse arm requirement and duration from tokens[6] and tokens[7]
-                arm_requirement = int(tokens[6].strip())
-                duration = int(tokens[7].strip())
-                # Create an Item object and add to the items list
-                item = Item(item_id, name, weight, loc, arm_requirement, duration)
-                items.append(item)
+                items.append(parse_item(tokens))
+            elif tokens[0].strip() == 'Depot':
+                depot = parse_depot(tokens)
 
         ##############################################################
         # End of TASK 1
         ##############################################################
-       
-    # Do a task allocation
-    items_remaining = simple_allocation(robots, items)
 
-    # Animate the simulation
-    animate(robots, items, sim_time, room_size)
+    if depot is not None:
+        for robot in robots:
+            robot.set_depot(*depot)
+    return sim_time, room_size, robots, items
 
-    # Print descriptive output
-    output_results(robots, items_remaining)
+
+def parse_robot(tokens, sim_time):
+    """
+    Returns a `Robot` built from the comma-separated tokens of a Robot line.
+
+    Parameters:
+    -----------
+
+    tokens: list; the line split on commas, e.g. ['Robot', ' 1', ' 4', ' [4', '4]']
+
+    sim_time: int; the total number of timesteps, used as the robot's total time
+    """
+    # Parse robot data: Robot, ID, max_weight, [x, y]
+    # Format: Robot, 1, 4, [4,4]
+    # After splitting by comma: ['Robot', ' 1', ' 4', ' [4', '4]']
+    robot_id = int(tokens[1].strip())
+    max_weight = float(tokens[2].strip())
+    # Parse the location which is split across tokens[3] and tokens[4]
+    # tokens[3] contains '[x' and tokens[4] contains 'y]'
+    x_str = tokens[3].strip().replace('[', '')
+    y_str = tokens[4].strip().replace(']', '')
+    init_loc = [float(x_str), float(y_str)]
+    # Create a Robot object
+    return Robot(robot_id, max_weight, sim_time, init_loc)
+
+
+def parse_depot(tokens):
+    """
+    Returns (location, unload time) from the comma-separated tokens of a
+    Depot line.
+
+    Parameter:
+    -----------
+
+    tokens: list; the line split on commas, e.g. ['Depot', ' [0', '0]', ' 2']
+    """
+    # Format: Depot, [x,y] with an optional unload time
+    x_str = tokens[1].strip().replace('[', '')
+    y_str = tokens[2].strip().replace(']', '')
+    unload_time = int(tokens[3].strip()) if len(tokens) > 3 else 1
+    return [float(x_str), float(y_str)], unload_time
+
+
+def parse_item(tokens):
+    """
+    Returns an `Item` built from the comma-separated tokens of an Item line.
+
+    Parameter:
+    -----------
+
+    tokens: list; the line split on commas, e.g.
+    ['Item', ' 1', ' apples', ' 12', ' [3', '3]', ' 1', ' 1']
+
+    Two optional trailing tokens give the item's release time and due time;
+    an empty release time means 0 and an empty due time means no deadline.
+    """
+    # Parse item data: Item, ID, name, weight, [x, y], arms, duration[, release, due]
+    # Format: Item, 1, apples, 12, [3,3], 1, 1
+    # After splitting by comma: ['Item', ' 1', ' apples', ' 12', ' [3', '3]', ' 1', ' 1']
+    item_id = int(tokens[1].strip())
+    name = tokens[2].strip()
+    weight = float(tokens[3].strip())
+    # Parse the location which is split across tokens[4] and tokens[5]
+    # tokens[4] contains '[x' and tokens[5] contains 'y]'
+    x_str = tokens[4].strip().replace('[', '')
+    y_str = tokens[5].strip().replace(']', '')
+    loc = [float(x_str), float(y_str)]
+    # Parse arm requirement and duration from tokens[6] and tokens[7]
+    arm_requirement = int(tokens[6].strip())
+    duration = int(tokens[7].strip())
+    # Parse the optional release time and due time from tokens[8] and tokens[9]
+    release_time = int(tokens[8].strip()) if len(tokens) > 8 and tokens[8].strip() else 0
+    due_time = int(tokens[9].strip()) if len(tokens) > 9 and tokens[9].strip() else None
+    # Create an Item object
+    return Item(item_id, name, weight, loc, arm_requirement, duration, release_time, due_time)
     
 
+@register_strategy('simple')
 def simple_allocation(robots, items):
     """
     Given a list of items and a list of robots, allocate item pickups to the robots.
@@ -158,41 +232,63 @@ def animate(robots, items, sim_time, room_size):
     
     roomsize : list; length-2 list that represents the dimensions of the room
     """
+    import matplotlib.pyplot as plt
     plt.close('all')
     plt.figure()
     plt.pause(1)
     for t in range(0, sim_time + 1):
-        # Clear axis
-        plt.cla()
-        plt.axis('equal')
-        plt.axis('off')
-        # Draw the room
-        plt.axis([0, room_size[0] + 1, 0, room_size[1] + 1])
-        plt.title(f"Time = {t}")
-
-        ##################################################################
-        # TASK 3: Add code for drawing the items and robots at time step t
-        ##################################################################
-        # Draw all items at time step t
-        for item in items:
-            # Each item's draw method handles whether it should be drawn at time t
-            item.draw(t)
-
-        # Draw all robots at time step t
-        for robot in robots:
-            # Get the robot's location at time step t
-            robot_loc = robot.get_location(t)
-            # Draw the robot at its current location
-            robot.draw(robot_loc)
-
-        ##################################################################
-        # End of TASK 3
-        ##################################################################
-        
+        draw_frame(robots, items, t, room_size)
         b= 1  # blink time of 1 second for animation
         plt.pause(b)
 
 
+def draw_frame(robots, items, t, room_size):
+    """
+    Draws the room, the items and the robots at time step `t` on the current
+    axis, clearing whatever was drawn before.
+
+    Assumes figure window is already open.
+
+    Parameters
+    ----------
+
+    robots : list; list of `Robot` references
+
+    items : list; list of `Item` references
+
+    t : int; the timestep to draw
+
+    room_size : list; length-2 list that represents the dimensions of the room
+    """
+    import matplotlib.pyplot as plt
+    # Clear axis
+    plt.cla()
+    plt.axis('equal')
+    plt.axis('off')
+    # Draw the room
+    plt.axis([0, room_size[0] + 1, 0, room_size[1] + 1])
+    plt.title(f"Time = {t}")
+
+    ##################################################################
+    # TASK 3: Add code for drawing the items and robots at time step t
+    ##################################################################
+    # Draw all items at time step t
+    for item in items:
+        # Each item's draw method handles whether it should be drawn at time t
+        item.draw(t)
+
+    # Draw all robots at time step t
+    for robot in robots:
+        # Get the robot's location at time step t
+        robot_loc = robot.get_location(t)
+        # Draw the robot at its current location
+        robot.draw(robot_loc)
+
+    ##################################################################
+    # End of TASK 3
+    ##################################################################
+
+
 def output_results(robots, items_remaining):
     """
     Prints the results of task allocation. Show the stats and tasks for each 
@@ -228,13 +324,17 @@ def output_results(robots, items_remaining):
         # Only print if the robot picked at least one item
         if len(items_picked) > 0:
             # Print robot stats: ID, number of items, and total operation time
+            # Depot drop-offs and idle periods are stops, not items
             robot_id = robot.get_id()
-            num_items = len(items_picked)
+            num_items = len([item for item in items_picked if not item.is_stop])
             total_time = robot.total_operation_time()
             print(f"Robot {robot_id} picked {num_items} items in {total_time} timesteps")
 
             # Print information for each item picked by this robot
             for item in items_picked:
+                if item.is_stop:
+                    print(item.describe())
+                    continue
                 # Get the item's name, ID, and pickup window
                 item_name = item.name
                 item_id = item.id_
@@ -263,5 +363,42 @@ def output_results(robots, items_remaining):
     ##############################################################
 
 
+def export_results(robots, items_remaining, filename):
+    """
+    Writes the results of task allocation to `filename` as JSON: one entry per
+    `Robot` with the `Item`s it picked and their pick-up windows (and its stops:
+    depot drop-offs in carrying mode, idle periods), followed by
+    the `Item`s that the robots were not able to pick up.
+
+    Parameters:
+    ------------
+
+    robots: list; each element is a `Robot` in the simulation
+
+    items_remaining: list; each element is an `Item` that the robots were not
+    able to pick up.
+
+    filename: string; the name of the JSON file to write
+    """
+    results = {"robots": [], "items_remaining": []}
+    for robot in robots:
+        picks = []
+        for item in robot.get_items_picked():
+            if item.is_stop:
+                picks.append(item.as_dict())
+                continue
+            picks.append({"id": item.id_, "name": item.name,
+                          "assigned": item.picked_window.left,
+                          "picked": item.picked_window.right})
+        results["robots"].append({"id": robot.get_id(),
+                                  "total_time": robot.total_operation_time(),
+                                  "items": picks})
+    for item in items_remaining:
+        results["items_remaining"].append({"id": item.id_, "name": item.name})
+
+    with open(filename, 'w') as fid:
+        json.dump(results, fid, indent=2)
+
+
 if __name__ == '__main__':
     run_robots("room1.txt")
\ No newline at end of file
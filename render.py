@@ -0,0 +1,254 @@
+# render.py
+"""
+Offline rendering of a simulation to a video file or a PNG image sequence,
+without a display window
+
+render_video draws every frame in this process. render_frames precomputes
+the robot positions and item visibility of every frame, then splits the
+frames across a process pool; each worker draws its frame range with the
+Agg backend and writes PNG files, which stitch joins into a video.
+
+Example (throughput against worker count):
+    python render.py room1.txt --workers 1,2,4
+"""
+
+
+from main import draw_frame, load_room, simple_allocation
+from shapes import draw_rect, draw_disk
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import logging
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import matplotlib.pyplot as plt
+from matplotlib import animation
+import numpy as np
+
+
+def render_video(robots, items, sim_time, room_size, filename, fps=5):
+    """
+    Renders the robots and items for timesteps 0 through `sim_time` into the
+    video file `filename`. A .gif file is written with Pillow; any other
+    extension (e.g. .mp4) requires ffmpeg to be installed.
+
+    Parameters
+    ----------
+
+    robots : list; list of `Robot` references
+
+    items : list; list of `Item` references
+
+    sim_time : int; number of timesteps
+
+    room_size : list; length-2 list that represents the dimensions of the room
+
+    filename : string; the name of the video file to write
+
+    fps : int; frames (timesteps) per second of video.  Default: 5
+    """
+    if filename.lower().endswith('.gif'):
+        writer = animation.PillowWriter(fps=fps)
+    else:
+        writer = animation.FFMpegWriter(fps=fps)
+
+    fig = plt.figure()
+    with writer.saving(fig, filename, dpi=100):
+        for t in range(0, sim_time + 1):
+            draw_frame(robots, items, t, room_size)
+            writer.grab_frame()
+    plt.close(fig)
+
+
+def frame_data(robots, items, sim_time):
+    """
+    Returns a dict of plain arrays describing every frame, so that frames can
+    be drawn without the `Robot` and `Item` objects:
+
+    robot_ids: list of robot ids
+    positions: array of shape (sim_time + 1, number of robots, 2); the
+        location of each robot at each timestep
+    item_ids: list of item ids
+    item_locs: array of shape (number of items, 2)
+    hidden_from: array; the timestep from which each item is no longer drawn
+        (infinity for items that are never picked up)
+
+    Parameters
+    ----------
+
+    robots : list; list of `Robot` references
+
+    items : list; list of `Item` references
+
+    sim_time : int; number of timesteps
+    """
+    positions = np.empty((sim_time + 1, len(robots), 2))
+    for t in range(0, sim_time + 1):
+        for r, robot in enumerate(robots):
+            positions[t, r] = robot.get_location(t)
+    hidden_from = [math.inf if item.picked_window is None else item.picked_window.right
+                   for item in items]
+    return {'robot_ids': [robot.get_id() for robot in robots],
+            'positions': positions,
+            'item_ids': [item.id_ for item in items],
+            'item_locs': np.array([item.loc for item in items], dtype=float).reshape(-1, 2),
+            'hidden_from': np.array(hidden_from, dtype=float)}
+
+
+def draw_frame_data(data, t, first, room_size):
+    """
+    Draws frame `t` from `data` on the current axis, the same way
+    main.draw_frame draws it from the live objects.
+
+    Parameters
+    ----------
+
+    data : dict; as returned by frame_data, with `positions` possibly
+    restricted to the frames starting at `first`
+
+    t : int; the timestep to draw
+
+    first : int; the timestep of `data['positions'][0]`
+
+    room_size : list; length-2 list that represents the dimensions of the room
+    """
+    plt.cla()
+    plt.axis('equal')
+    plt.axis('off')
+    plt.axis([0, room_size[0] + 1, 0, room_size[1] + 1])
+    plt.title(f"Time = {t}")
+    for item_id, loc, hidden in zip(data['item_ids'], data['item_locs'], data['hidden_from']):
+        if t < hidden:
+            draw_rect(loc[0] - 0.5, loc[1] - 0.5, 1, 1, 'r')
+            plt.text(loc[0], loc[1], str(item_id), horizontalalignment="center")
+    for robot_id, loc in zip(data['robot_ids'], data['positions'][t - first]):
+        draw_disk(loc[0], loc[1], 0.5, 'b')
+        plt.text(loc[0], loc[1], str(robot_id), horizontalalignment="center")
+
+
+def _render_chunk(data, first, last, room_size, out_dir):
+    """
+    Worker: draws frames `first` through `last` (inclusive) and saves them as
+    PNG files in `out_dir`. Returns the list of file names, in frame order.
+    """
+    plt.switch_backend('Agg')
+    # Workers may not inherit the logger level (see the __main__ block)
+    logging.getLogger('matplotlib').setLevel(logging.ERROR)
+    fig = plt.figure()
+    paths = []
+    for t in range(first, last + 1):
+        draw_frame_data(data, t, first, room_size)
+        path = os.path.join(out_dir, f"frame_{t:06d}.png")
+        fig.savefig(path, dpi=100)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def render_frames(robots, items, sim_time, room_size, out_dir, workers=None):
+    """
+    Renders timesteps 0 through `sim_time` as PNG files frame_000000.png,
+    frame_000001.png, ... in `out_dir`, splitting the frames into contiguous
+    ranges across `workers` processes. Returns the list of file names in
+    frame order.
+
+    Parameters
+    ----------
+
+    robots : list; list of `Robot` references
+
+    items : list; list of `Item` references
+
+    sim_time : int; number of timesteps
+
+    room_size : list; length-2 list that represents the dimensions of the room
+
+    out_dir : string; directory for the PNG files; created if missing
+
+    workers : int; number of worker processes.  Default: os.cpu_count()
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    data = frame_data(robots, items, sim_time)
+    n_frames = sim_time + 1
+    # A few ranges per worker keeps the pool busy when frames differ in cost
+    n_chunks = min(n_frames, workers * 4)
+    bounds = [n_frames * k // n_chunks for k in range(n_chunks + 1)]
+
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for first, end in zip(bounds[:-1], bounds[1:]):
+            chunk = dict(data, positions=data['positions'][first:end])
+            futures.append(pool.submit(_render_chunk, chunk, first, end - 1,
+                                       list(room_size), out_dir))
+        for future in futures:
+            paths.extend(future.result())
+    return paths
+
+
+def stitch(frame_paths, filename, fps=5):
+    """
+    Joins the PNG files `frame_paths` (in order) into the video `filename`.
+    A .gif file is written with Pillow; any other extension requires ffmpeg.
+
+    Parameters
+    ----------
+
+    frame_paths : list; PNG file names in frame order
+
+    filename : string; the name of the video file to write
+
+    fps : int; frames (timesteps) per second of video.  Default: 5
+    """
+    if filename.lower().endswith('.gif'):
+        from PIL import Image
+
+        def load(path):
+            # Read the frame into memory and close the file right away, so
+            # thousands of frames never hold thousands of open files
+            with Image.open(path) as image:
+                return image.copy()
+
+        first = load(frame_paths[0])
+        first.save(filename, save_all=True, append_images=(load(path) for path in frame_paths[1:]),
+                   duration=round(1000 / fps), loop=0)
+        return
+
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError(f"ffmpeg is required to write {filename}")
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+        for path in frame_paths:
+            listing.write(f"file '{os.path.abspath(path)}'\nduration {1 / fps}\n")
+    try:
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', listing.name, '-pix_fmt', 'yuv420p', filename], check=True)
+    finally:
+        os.remove(listing.name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure parallel frame rendering throughput.")
+    parser.add_argument('room', help="room file to render")
+    parser.add_argument('--workers', default='1,2,4',
+                        help="comma-separated worker counts to compare (default: 1,2,4)")
+    parser.add_argument('--out-dir', default=None, help="keep the frames of the last run here")
+    args = parser.parse_args()
+
+    plt.switch_backend('Agg')
+    # The fixed axis limits of the frames make matplotlib warn on every frame
+    logging.getLogger('matplotlib').setLevel(logging.ERROR)
+    sim_time, room_size, robots, items = load_room(args.room)
+    simple_allocation(robots, items)
+    print(f"{'workers':>8}{'seconds':>10}{'frames/s':>10}{'speedup':>9}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            render_frames(robots, items, sim_time, room_size, args.out_dir or tmp, workers)
+            seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{workers:>8}{seconds:>10.2f}{(sim_time + 1) / seconds:>10.1f}{baseline / seconds:>9.2f}")
@@ -0,0 +1,261 @@
+# repair.py
+"""
+Incremental schedule repair when a robot fails or is taken off the floor
+
+suspend_robot takes a robot out of service from time t, either until a
+later time or, with remove_robot, for the rest of the shift. The pick-ups it
+completed by t are kept; the rest of its schedule is dropped and replaced by
+an `Idle` stop where the robot stands at t (in carrying mode, after a last
+trip to the depot with what it carries). Its unfinished items are then
+offered to the robots, each first trying to fit the item into an idle gap of
+a robot's schedule after t (leaving every other pick-up unchanged) and then
+appending it at the end of the least busy robot's schedule. The work done is
+proportional to the number of unfinished items, not to the size of the room.
+
+Example (repair latency against re-allocating from scratch):
+    python repair.py big.txt --repairs 20
+"""
+
+
+from main import load_room, simple_allocation
+from robot import travel_time
+import argparse
+import bisect
+import checkpoint
+import random
+import statistics
+import time
+
+
+def suspend_robot(robots, robot, t, until=None, max_gaps=32):
+    """
+    Takes `robot` out of service from time `t` to time `until` and reassigns
+    its unfinished items to the robots. Returns the list of unfinished items
+    that could not be reassigned.
+
+    An item is unfinished if its pick-up does not end by `t`; an item being
+    picked at `t` is picked again from scratch. In carrying mode, a robot
+    that still carries items at `t` first takes them to the depot and waits
+    there instead. That trip always fits in the shift, since the robot's old
+    schedule brought the same items to the depot from further along.
+
+    Raises ValueError unless t < until <= `robot._total_time`.
+
+    Parameters:
+    -----------
+
+    robots: list; all the `Robot`s, `robot` included. `robot` itself takes
+    part in the reassignment once it is back in service
+
+    robot: Robot; the robot to suspend
+
+    t: int; the time at which the robot stops
+
+    until: int; the time at which it is back in service.  Default: the end of
+    the shift, `robot._total_time`
+
+    max_gaps: int; the number of idle gaps after `t` tried per robot before
+    falling back to appending.  Default: 32
+    """
+    until = robot._total_time if until is None else until
+    if not t < until <= robot._total_time:
+        raise ValueError(f"Cannot suspend robot {robot.get_id()} from {t} until {until}")
+
+    # Where the robot stands at `t`, before its schedule changes
+    loc = robot.get_location(t)
+    picked = robot._items_picked
+    # The first stop that does not end by `t`; windows end in schedule order
+    k = bisect.bisect_right(picked, t, key=lambda stop: stop.picked_window.right)
+    unfinished = [item for item in picked[k:] if not item.is_stop]
+    for item in unfinished:
+        item.picked_window = None
+
+    robot.load_items_picked(picked[:k])
+    t_back = t
+    if robot._depot is not None and robot._load > 0:
+        # Leave from where the robot stands at `t`, unload, and wait there
+        robot.deliver_load(loc, t)
+        t_back, loc = robot.total_operation_time(), robot.latest_resting_loc()
+    if t_back < until:
+        robot.add_idle(loc, t_back, until)
+    return reassign(robots, unfinished, t, max_gaps)
+
+
+def remove_robot(robots, robot, t, max_gaps=32):
+    """
+    Takes `robot` out of service from time `t` for the rest of the shift and
+    reassigns its unfinished items. The robot stays in `robots` so that its
+    completed pick-ups are still reported. Returns the list of unfinished
+    items that could not be reassigned.
+
+    Parameters:
+    -----------
+
+    robots, robot, t, max_gaps: see suspend_robot
+    """
+    return suspend_robot(robots, robot, t, None, max_gaps)
+
+
+def reassign(robots, items, t, max_gaps=32):
+    """
+    Schedules each of `items` on one of `robots`, no earlier than time `t`:
+    in an idle gap of a robot's schedule if one is long enough, otherwise at
+    the end of the schedule of the least busy robot that can take it.
+    Returns the list of items that could not be scheduled.
+
+    Parameters:
+    -----------
+
+    robots: list; each element is a `Robot`
+
+    items: list; unscheduled `Item`s
+
+    t: int; the earliest time at which the robots can change their plans
+
+    max_gaps: int; the number of idle gaps after `t` tried per robot.
+    Default: 32
+    """
+    items_remaining = []
+    appended = {}
+    for item in items:
+        if any(insert_pick(robot, item, t, max_gaps) for robot in robots):
+            continue
+        for robot in sorted(robots, key=lambda robot: robot.total_operation_time()):
+            if append_pick(robot, item, t):
+                appended[id(robot)] = robot
+                break
+        else:
+            items_remaining.append(item)
+
+    # In carrying mode, bring the appended items to the depot
+    for robot in appended.values():
+        robot.deliver_load()
+    return items_remaining
+
+
+def insert_pick(robot, item, t, max_gaps=32):
+    """
+    Inserts the pick-up of `item` into an idle gap of `robot`'s schedule that
+    starts at `t` or later, if the robot can travel to the item, pick it up
+    and still reach its next stop in time. Returns True if the item was
+    inserted. Robots in carrying mode are left alone, since an extra item
+    changes the load of the rest of the trip.
+
+    Parameters:
+    -----------
+
+    robot: Robot; the robot
+
+    item: Item; an unscheduled item
+
+    t: int; the earliest time at which the robot can change its plans
+
+    max_gaps: int; the number of gaps tried.  Default: 32
+    """
+    if robot._depot is not None or not item.valid_pickup(robot._max_weight, 0):
+        return False
+    picked = robot._items_picked
+    # The gap before picked[j] starts when picked[j - 1] ends, which must be
+    # at `t` or later; the robot leaves its initial location at time 0
+    first = bisect.bisect_left(picked, t, key=lambda stop: stop.picked_window.right) + 1
+    if t <= 0:
+        first = 0
+    for j in range(first, min(first + max_gaps, len(picked))):
+        if j == 0:
+            departure_time, loc = 0, robot._init_loc
+        else:
+            departure_time, loc = picked[j - 1].picked_window.right, picked[j - 1].loc
+        arrival_time = departure_time + travel_time(loc, item.loc)
+        start_time = max(arrival_time, item.release_time)
+        finish_time = start_time + item.duration
+        if item.due_time is not None and finish_time > item.due_time:
+            # Later gaps only start later
+            return False
+        next_stop = picked[j]
+        if finish_time + travel_time(item.loc, next_stop.loc) <= next_stop.picked_window.left:
+            robot.insert_pick(j, item, start_time)
+            return True
+    return False
+
+
+def append_pick(robot, item, t):
+    """
+    Appends the pick-up of `item` to `robot`'s schedule with Robot.pick,
+    leaving no earlier than `t`. Returns True if the item was scheduled.
+
+    A robot whose schedule ends before `t` has been resting since then, so it
+    gets an `Idle` stop up to `t` first. In carrying mode the caller must
+    still schedule the final trip to the depot (Robot.deliver_load).
+
+    Parameters:
+    -----------
+
+    robot: Robot; the robot
+
+    item: Item; an unscheduled item
+
+    t: int; the earliest time at which the robot can change its plans
+    """
+    rest_time = robot.total_operation_time()
+    if rest_time < t:
+        robot.add_idle(robot.latest_resting_loc(), rest_time, t)
+    if robot.pick(item, do_pick=True, num_arms=0):
+        return True
+    if rest_time < t:
+        robot.remove_latest_stop()
+    return False
+
+
+def bench(data_filename, repairs=20, seed=0):
+    """
+    Prints the latency of remove_robot for `repairs` random robots and times
+    against re-allocating the whole room with simple_allocation.
+
+    Parameters:
+    -----------
+
+    data_filename: string; the name of the room file
+
+    repairs: int; number of timed repairs.  Default: 20
+
+    seed: int; seed of the random choice of robots and times.  Default: 0
+    """
+    sim_time, room_size, robots, items = load_room(data_filename)
+    start = time.perf_counter()
+    simple_allocation(robots, items)
+    full_seconds = time.perf_counter() - start
+    branch = checkpoint.Branch(checkpoint.dumps(robots, items), robots, items)
+
+    rng = random.Random(seed)
+    latencies = []
+    affected = []
+    lost = []
+    for _ in range(repairs):
+        # Every repair starts from the original allocation
+        branch.revert()
+        robot = rng.choice(robots)
+        t = rng.randrange(max(robot.total_operation_time(), 1))
+        n_unfinished = sum(1 for item in robot._items_picked
+                           if not item.is_stop and item.picked_window.right > t)
+        start = time.perf_counter()
+        items_remaining = remove_robot(robots, robot, t)
+        latencies.append(time.perf_counter() - start)
+        affected.append(n_unfinished)
+        lost.append(len(items_remaining))
+
+    print(f"{len(items)} items, {len(robots)} robots")
+    print(f"  full allocation:  {full_seconds * 1000:10.2f} ms")
+    print(f"  repair, median:   {statistics.median(latencies) * 1000:10.2f} ms  "
+          f"({full_seconds / statistics.median(latencies):.0f}x faster)")
+    print(f"  repair, worst:    {max(latencies) * 1000:10.2f} ms")
+    print(f"  unfinished items per repair: {statistics.mean(affected):.1f} on average, "
+          f"{sum(lost)} of {sum(affected)} could not be reassigned")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark schedule repair after removing a robot.")
+    parser.add_argument('room', help="room file")
+    parser.add_argument('--repairs', type=int, default=20, help="timed repairs (default: 20)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+    bench(args.room, args.repairs, args.seed)
@@ -1,8 +1,9 @@
 # robot.py
 
 
+from interval import Interval
+from item import DropOff, Idle
 from shapes import draw_disk
-import matplotlib.pyplot as plt
 import copy
 
 
@@ -27,6 +28,19 @@ class Robot:
 
     _items_picked: list; each element of the list is an Item that the robot has 
     picked up. The list is initially empty
+
+    _depot: list; the location of the depot in carrying mode, or None. In
+    carrying mode the robot carries the items it picks, up to `_max_weight` in
+    total, and unloads them at the depot (a `DropOff` in `_items_picked`)
+
+    _unload_time: int; the time steps needed to unload at the depot
+
+    _batch: bool; whether the robot carries several items per trip to the depot
+
+    _load: number; the total weight the robot carries after its latest pick-up
+
+    _revision: int; counts the changes to `_items_picked`, so that a
+    checkpoint.Branch can tell whether the schedule changed
     """
 
 
@@ -53,6 +67,12 @@ class Robot:
         self._init_loc = init_loc
         # Initialize the list of items picked as empty
         self._items_picked = []
+        # Carrying mode is off until a depot is set
+        self._depot = None
+        self._unload_time = 1
+        self._batch = True
+        self._load = 0
+        self._revision = 0
         
 
 
@@ -71,16 +91,170 @@ class Robot:
         """
         # Return a deep copy of the items picked list
         return copy.deepcopy(self._items_picked)
-        
-   
+
+
+    def load_items_picked(self, items):
+        """
+        Replaces `_items_picked` with the Items in `items`, in order. The
+        Items' picked_windows must already be set; nothing is checked.  Used to
+        restore a schedule that was computed elsewhere.
+
+        Parameter:
+        -----------
+
+        items: list; the Items picked by the robot, in pick-up order
+        """
+        self._items_picked = list(items)
+        self._revision += 1
+        # The load is whatever was picked since the latest drop-off
+        self._load = 0
+        if self._depot is None:
+            return
+        for item in reversed(self._items_picked):
+            if isinstance(item, DropOff):
+                break
+            self._load += item.weight
+
+
+    def compact(self):
+        """
+        Forgets every entry of `_items_picked` but the latest one and returns
+        the Items (and stops) forgotten, in pick-up order.
+
+        total_operation_time(), latest_resting_loc(), the carrying load and
+        later pick-ups are unaffected, but get_location() is only meaningful
+        from the latest pick-up on. Used to keep memory flat when items are
+        streamed through the robot (see streaming.py).
+        """
+        forgotten = self._items_picked[:-1]
+        del self._items_picked[:-1]
+        self._revision += 1
+        return forgotten
+
+
+    def set_depot(self, loc, unload_time=1, batch=True):
+        """
+        Turns on carrying mode: the robot carries the items it picks and
+        unloads them at the depot at `loc`.
+
+        Parameters:
+        -----------
+
+        loc: list; a length-2 list of the location of the depot
+
+        unload_time: int; the time steps needed to unload.  Default: 1
+
+        batch: bool; if True the robot keeps picking until the next item would
+        exceed `_max_weight`; if False it brings every item to the depot
+        before picking the next one.  Default: True
+        """
+        self._depot = loc
+        self._unload_time = unload_time
+        self._batch = batch
+
+
+    def deliver_load(self, from_loc=None, from_time=None):
+        """
+        In carrying mode, schedules a final trip to the depot if the robot is
+        still carrying anything.  Returns True if a trip was scheduled.
+
+        `pick` only accepts items that leave enough time for this trip, so it
+        always fits within `_total_time`.
+
+        Parameters:
+        -----------
+
+        from_loc: list; a length 2 list of where the trip starts, e.g. where
+        a robot taken out of service stands mid-trip.  Default: the latest
+        resting location
+
+        from_time: int; the time at which the trip starts.  Default: the
+        total operation time
+        """
+        if self._depot is None or self._load == 0:
+            return False
+        from_loc = self.latest_resting_loc() if from_loc is None else from_loc
+        from_time = self.total_operation_time() if from_time is None else from_time
+        path = self.travel_steps(from_loc, self._depot)
+        drop_off = DropOff(self._depot, self._unload_time)
+        drop_off.update_pickup_status(from_time + len(path) - 1)
+        self._items_picked.append(drop_off)
+        self._load = 0
+        self._revision += 1
+        return True
+
+
+    def add_idle(self, loc, start_time, end_time):
+        """
+        Appends an `Idle` stop at `loc` from `start_time` to `end_time` to
+        `_items_picked` and returns it. The robot must be able to reach `loc`
+        by `start_time`; nothing is checked. Used when a robot is out of
+        service or waits for a later time (see repair.py).
+
+        Parameters:
+        -----------
+
+        loc: list; a length 2 list storing the x-y coordinate of the stop
+
+        start_time: int; the time at which the robot stops at `loc`
+
+        end_time: int; the time at which it leaves again, at least `start_time`
+        """
+        idle = Idle(loc, end_time - start_time)
+        idle.update_pickup_status(start_time)
+        self._items_picked.append(idle)
+        self._revision += 1
+        return idle
+
+
+    def remove_latest_stop(self):
+        """
+        Removes the latest entry of `_items_picked`, which must be a stop, and
+        returns it, e.g. an Idle stop after which a pick-up did not fit.
+        """
+        if not self._items_picked or not self._items_picked[-1].is_stop:
+            raise ValueError(f"Robot {self._id_} has no stop to remove")
+        stop = self._items_picked.pop()
+        self._revision += 1
+        if isinstance(stop, DropOff):
+            # The load of the trip before it is carried again
+            self.load_items_picked(self._items_picked)
+        return stop
+
+
+    def insert_pick(self, index, item, start_time):
+        """
+        Schedules the pick-up of `item` at `start_time`, before the entry at
+        `index` of `_items_picked`. The caller must make sure that the robot
+        can travel to `item` and on to that entry in time; nothing else is
+        checked. Not available in carrying mode, where an extra item would
+        change the load of the rest of the trip.
+
+        Parameters:
+        -----------
+
+        index: int; the position of the pick-up in `_items_picked`
+
+        item: Item; an item that has not been scheduled yet
+
+        start_time: int; the time at which the pick-up starts
+        """
+        if self._depot is not None:
+            raise ValueError(f"Robot {self._id_} is in carrying mode")
+        item.update_pickup_status(start_time)
+        self._items_picked.insert(index, item)
+        self._revision += 1
+
+
 
     def total_operation_time(self):
         """
         Returns the total operation time of the robot immediately after
-        completing its most recent Item pick-up. The return type is int.
+        completing its most recent Item pick-up or stop (a depot drop-off or an
+        idle period). The return type is int.
 
-        You may find it useful to leverage the `_items_picked_` attribute. If
-        no item has been picked up, return 0 as the total operation time.
+        If nothing has been picked up and there are no stops, the total
+        operation time is 0.
         """
         # Check if any items have been picked up
         if len(self._items_picked) == 0:
@@ -130,6 +304,8 @@ class Robot:
         loc: list; a length 2 list storing the x- and y-coordinates at which
         the robot should be drawn.
         """
+        # Imported here so that the scheduling code never loads matplotlib
+        import matplotlib.pyplot as plt
         # Draw a blue disk with diameter 1 (radius 0.5) at the given location
         draw_disk(loc[0], loc[1], 0.5, 'b')
         # Add the robot's id as text at the center
@@ -208,6 +384,12 @@ class Robot:
         1. the robot's physical characteristics allows it to pick up `item`
         2. the robot can travel to `item` and fully pick it up in time
         3. `item` has not yet been scheduled for pickup
+        4. the pick-up fits in `item`'s available window; a robot that arrives
+           before the release time waits at the item
+
+        In carrying mode, a robot whose load would exceed `_max_weight` first
+        unloads at the depot, and condition 2 includes the time to bring
+        `item` to the depot afterwards.
 
         If the pick-up is executed, we need to:
         1. Update `item`'s picked_window
@@ -234,37 +416,66 @@ class Robot:
         # given total simulation time `_total_time`?
         # Hint: you may find the total_operation_time(), latest_resting_loc(),
         # and travel_steps() methods useful.
-        # Calculate the time needed to travel from current location to the item
         current_loc = self.latest_resting_loc()
+        departure_time = self.total_operation_time()
+        # In carrying mode, unload at the depot first if the item would not fit
+        drop_off_time = None
+        if self._depot is not None and self._load > 0 and (
+                not self._batch or self._load + item.weight > self._max_weight):
+            depot_path = self.travel_steps(current_loc, self._depot)
+            drop_off_time = departure_time + len(depot_path) - 1
+            current_loc = self._depot
+            departure_time = drop_off_time + self._unload_time
+        # Calculate the time needed to travel from current location to the item
         travel_path = self.travel_steps(current_loc, item.loc)
         # Time to travel is the length of the path minus 1
         # (since the first position is the current location)
         travel_time = len(travel_path) - 1
         # Time when robot arrives at the item
-        arrival_time = self.total_operation_time() + travel_time
+        arrival_time = departure_time + travel_time
+        # The robot waits at the item until it is released
+        start_time = max(arrival_time, item.release_time)
         # Time when robot finishes picking up the item
-        finish_time = arrival_time + item.duration
+        finish_time = start_time + item.duration
+        # In carrying mode the robot must still be able to bring the item to the depot
+        return_time = 0
+        if self._depot is not None:
+            return_time = len(self.travel_steps(item.loc, self._depot)) - 1 + self._unload_time
         # Check if the robot can complete the pickup within the total time
-        time_ok = finish_time <= self._total_time
+        time_ok = finish_time + return_time <= self._total_time
 
         # Condition 3: is the item not already scheduled for pick-up?
         # Hint: `item` has a relevant attribute that you may need.
         # Check if the item's picked_window is None (not yet scheduled)
         not_scheduled = item.picked_window is None
 
-        # If all three conditions above are met, set `success` to True.
-        # Check if all three conditions are satisfied
-        success = physical_ok and time_ok and not_scheduled
+        # Condition 4: does the pick-up meet the item's deadline?
+        if item.due_time is None:
+            window_ok = True
+        else:
+            window_ok = Interval(start_time, finish_time).is_in(item.available_window())
+
+        # If all four conditions above are met, set `success` to True.
+        # Check if all four conditions are satisfied
+        success = physical_ok and time_ok and not_scheduled and window_ok
 
         # If the robot is able to pick up the item and `do_pick` is True,
         # we execute the pick-up by
         # (1) Updating the item's `picked_window`
         # (2) Updating the robot's `_items_picked`
         if success and do_pick:
-            # Update the item's pickup status with the arrival time
-            item.update_pickup_status(arrival_time)
+            # Schedule the unloading at the depot, if any
+            if drop_off_time is not None:
+                drop_off = DropOff(self._depot, self._unload_time)
+                drop_off.update_pickup_status(drop_off_time)
+                self._items_picked.append(drop_off)
+                self._load = 0
+            # Update the item's pickup status with the (possibly delayed) start time
+            item.update_pickup_status(start_time)
             # Add the item to the robot's list of picked items
             self._items_picked.append(item)
+            self._load += item.weight
+            self._revision += 1
 
         # Return `success`
         return success
@@ -272,14 +483,14 @@ class Robot:
 
     def get_location(self, t):
         """
-        Provided method that computes the location of the robot at a queried
-        time step t, where t >= 0.
-
-        This method calls the total_operation_time(), latest_resting_loc(), and
-        travel_steps() methods that you implemented and assumes correctness in
-        those methods. 
-
-        Read but DO NOT modify the code.
+        Returns the location of the robot at a queried time step t, where
+        t >= 0.
+
+        Stops (depot drop-offs, idle periods) are handled like items: the
+        robot travels to the stop and stays at its location for its window.
+        A robot that arrives before the release time of its next item waits
+        at the item's location. After its last pick-up or stop, the robot
+        rests at latest_resting_loc().
         """
         # If t is larger than the total operation time of the robot so far
         if t >= self.total_operation_time():
@@ -300,5 +511,28 @@ class Robot:
             time_offset = t - self._items_picked[index - 1].picked_window.right
         dest = self._items_picked[index].loc
         steps = self.travel_steps(curr, dest)
-        return steps[time_offset]
-    
\ No newline at end of file
+        # A robot that arrived before the item's release time waits there
+        return steps[min(time_offset, len(steps) - 1)]
+
+
+def travel_time(curr, dest):
+    """
+    Returns the number of time steps Robot.travel_steps takes from `curr` to
+    `dest`, without building the path: the robots move along x, then y, one
+    unit per time step, between integer coordinates.
+    """
+    return abs(int(dest[0]) - int(curr[0])) + abs(int(dest[1]) - int(curr[1]))
+
+
+def travel_times(locs, dest):
+    """
+    Returns travel_time between every row of `locs` and `dest`, as an array.
+
+    Parameters:
+    -----------
+
+    locs: numpy array; shape (n, 2), one x-y coordinate per row
+
+    dest: list; a length 2 list storing an x-y coordinate
+    """
+    return abs(locs.astype(int) - [int(dest[0]), int(dest[1])]).sum(axis=1)
@@ -3,11 +3,10 @@ Functions to draw rectangle and disk
 
 The shape is added to the current plot if a figure window is active. Otherwise,
 a new figure window will open.
-"""
-
 
-import matplotlib.pyplot as plt 
-import numpy as np
+matplotlib and numpy are imported on the first call, not at import time, so
+that modules using these functions load quickly when nothing is drawn.
+"""
 
 
 def draw_rect(a, b, w, h, c):
@@ -24,6 +23,7 @@ def draw_rect(a, b, w, h, c):
         h (float): The height of the rectangle
         c (str): The color of the rectangle
     """
+    import matplotlib.pyplot as plt
     x= [a, a+w, a+w, a]
     y= [b, b, b+h, b+h]
     plt.fill(x, y, color=c)
@@ -42,6 +42,8 @@ def draw_disk(xc, yc, r, c):
         r (float): The radius of the disk
         c (str): The color of the disk
     """
+    import matplotlib.pyplot as plt
+    import numpy as np
     theta= np.linspace(0, 2*np.pi, 100)
     cosines= np.cos(theta)
     sines= np.sin(theta)
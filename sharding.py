@@ -0,0 +1,241 @@
+# sharding.py
+"""
+Spatially sharded allocation
+
+The room is cut into a grid of tiles. Every tile with robots runs
+simple_allocation on its own robots and items in a worker process, working
+only on plain tuples. The schedules are then applied to the real `Robot`s
+and `Item`s, and a reconciliation pass offers every item left over to the
+robots of the neighboring tiles, the least busy first, then to those of the
+tiles further out.
+
+Registered as the 'sharded' strategy, e.g.
+    python cli.py big.txt --strategy sharded --param tiles=(4,4) --param workers=4 --no-animate
+
+Speedup and quality against the unsharded allocation:
+    python sharding.py big.txt --tiles 4x4 --workers 4
+"""
+
+
+from allocation import register_strategy
+from main import load_room, simple_allocation
+from robot import Robot, travel_time
+from item import Item, DropOff
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import time
+
+
+def tile_grid(robots, items, tiles, room_size=None):
+    """
+    Returns a function that maps a location to its tile (a pair of ints).
+
+    Parameters:
+    -----------
+
+    robots, items: lists of `Robot`s and `Item`s, used to find the extent of
+    the room when `room_size` is None
+
+    tiles: int or pair of ints; number of tiles along x and y
+
+    room_size: length-2 list; dimensions of the room, or None
+    """
+    nx, ny = (tiles, tiles) if isinstance(tiles, int) else tiles
+    if room_size is None:
+        locs = [robot.latest_resting_loc() for robot in robots] + [item.loc for item in items]
+        room_size = (max(loc[0] for loc in locs), max(loc[1] for loc in locs))
+    width = (room_size[0] + 1) / nx
+    height = (room_size[1] + 1) / ny
+
+    def tile_of(loc):
+        return (min(max(int(loc[0] // width), 0), nx - 1),
+                min(max(int(loc[1] // height), 0), ny - 1))
+
+    return tile_of
+
+
+def _allocate_tile(robot_rows, item_rows):
+    """
+    Worker: runs simple_allocation on one tile given as plain tuples.
+
+    robot_rows: list of (id, max_weight, total_time, init_loc, depot,
+    unload_time, batch)
+    item_rows: list of (index, weight, loc, arm_requirement, duration,
+    release_time, due_time)
+
+    Returns one list per robot of (item index, pick-up time) pairs, in order;
+    depot drop-offs have an item index of None.
+    """
+    robots = []
+    for *row, depot, unload_time, batch in robot_rows:
+        robot = Robot(*row)
+        if depot is not None:
+            robot.set_depot(depot, unload_time, batch)
+        robots.append(robot)
+    items = [Item(index, '', weight, loc, arms, duration, release_time, due_time)
+             for index, weight, loc, arms, duration, release_time, due_time in item_rows]
+    # Without the final trips to the depot: reconcile may still add items
+    simple_allocation.__wrapped__(robots, items)
+    return [[(None if item.is_stop else item.id_, item.picked_window.left)
+             for item in robot._items_picked]
+            for robot in robots]
+
+
+@register_strategy('sharded')
+def sharded_allocation(robots, items, tiles=2, workers=None, room_size=None):
+    """
+    Allocates item pickups tile by tile in parallel, then reconciles the
+    leftover items with the robots of the other tiles, nearest first.
+
+    Returns: list; a list of remaining `Item`s that did not get picked up.
+
+    Parameters:
+    -----------
+
+    robots: list; list of unique `Robot` references, none of which
+    has picked any item yet
+
+    items: list; non-empty list of unique `Item` references
+
+    tiles: int or pair of ints; number of tiles along x and y.  Default: 2
+
+    workers: int; number of worker processes, 1 to allocate in this
+    process.  Default: os.cpu_count()
+
+    room_size: length-2 list; dimensions of the room.  Default: the extent of
+    the robot and item locations
+    """
+    tile_of = tile_grid(robots, items, tiles, room_size)
+    robot_tiles = {}
+    for robot in robots:
+        robot_tiles.setdefault(tile_of(robot.latest_resting_loc()), []).append(robot)
+    item_tiles = {}
+    for index, item in enumerate(items):
+        item_tiles.setdefault(tile_of(item.loc), []).append(index)
+
+    # Tiles without robots are left for the reconciliation pass
+    jobs = []
+    for tile, tile_robots in robot_tiles.items():
+        robot_rows = [(robot.get_id(), robot._max_weight, robot._total_time, robot.latest_resting_loc(),
+                       robot._depot, robot._unload_time, robot._batch)
+                      for robot in tile_robots]
+        item_rows = [(index, items[index].weight, items[index].loc,
+                      items[index].arm_requirement, items[index].duration,
+                      items[index].release_time, items[index].due_time)
+                     for index in item_tiles.get(tile, [])]
+        jobs.append((tile_robots, robot_rows, item_rows))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        schedules = [_allocate_tile(robot_rows, item_rows) for _, robot_rows, item_rows in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            schedules = list(pool.map(_allocate_tile, *zip(*[job[1:] for job in jobs])))
+
+    for (tile_robots, _, _), schedule in zip(jobs, schedules):
+        for robot, picks in zip(tile_robots, schedule):
+            picked = []
+            for index, pickup_time in picks:
+                item = DropOff(robot._depot, robot._unload_time) if index is None else items[index]
+                item.update_pickup_status(pickup_time)
+                picked.append(item)
+            robot.load_items_picked(picked)
+
+    return reconcile(items, robot_tiles, tile_of)
+
+
+def reconcile(items, robot_tiles, tile_of):
+    """
+    Offers every unscheduled item to the robots of the tiles around its own,
+    least busy robot first, widening the ring of tiles until a robot takes
+    it. Returns the list of items that are still not scheduled.
+
+    Parameters:
+    -----------
+
+    items: list; all the `Item`s of the room
+
+    robot_tiles: dict; tile -> list of the `Robot`s that started in it
+
+    tile_of: function; maps a location to its tile
+    """
+    max_load = max((robot._max_weight for tile_robots in robot_tiles.values() for robot in tile_robots),
+                   default=0)
+    # Tile -> the robots of the other tiles, by ring (Chebyshev distance in
+    # tiles) around it. The robots of the item's own tile already turned it down
+    rings_of = {}
+    items_remaining = []
+    for item in items:
+        if item.picked_window is not None:
+            continue
+        if not item.valid_pickup(max_load, 0):
+            items_remaining.append(item)
+            continue
+        tx, ty = tile = tile_of(item.loc)
+        if tile not in rings_of:
+            rings = {}
+            for (x, y), tile_robots in robot_tiles.items():
+                ring = max(abs(x - tx), abs(y - ty))
+                if ring:
+                    rings.setdefault(ring, []).extend(tile_robots)
+            rings_of[tile] = [rings[ring] for ring in sorted(rings)]
+        for candidates in rings_of[tile]:
+            if any(_pick(robot, item)
+                   for robot in sorted(candidates, key=lambda robot: robot.total_operation_time())):
+                break
+        else:
+            items_remaining.append(item)
+    return items_remaining
+
+
+def _pick(robot, item):
+    """
+    Robot.pick with num_arms=0, skipped when plain arithmetic shows that
+    the robot cannot reach the item and pick it up within its shift
+    """
+    arrival = robot.total_operation_time() + travel_time(robot.latest_resting_loc(), item.loc)
+    if max(arrival, item.release_time) + item.duration > robot._total_time:
+        return False
+    return robot.pick(item, do_pick=True, num_arms=0)
+
+
+def schedule_stats(robots):
+    """
+    Returns (items picked, makespan, total operation time) of an allocation
+
+    Parameter:
+    -----------
+
+    robots: list; the allocated `Robot`s
+    """
+    times = [robot.total_operation_time() for robot in robots]
+    picked = sum(1 for robot in robots for item in robot._items_picked if not item.is_stop)
+    return picked, max(times, default=0), sum(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare sharded and unsharded allocation.")
+    parser.add_argument('room', help="room file")
+    parser.add_argument('--tiles', default='2x2', help="tiles along x and y, e.g. 4x4 (default: 2x2)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    tiles = tuple(int(n) for n in args.tiles.lower().split('x'))
+
+    rows = []
+    for name in ('unsharded', 'sharded'):
+        sim_time, room_size, robots, items = load_room(args.room)
+        start = time.perf_counter()
+        if name == 'sharded':
+            sharded_allocation(robots, items, tiles, args.workers, room_size)
+        else:
+            simple_allocation(robots, items)
+        seconds = time.perf_counter() - start
+        rows.append((name, seconds) + schedule_stats(robots))
+
+    print(f"{'':<10}{'seconds':>10}{'picked':>10}{'makespan':>10}{'busy time':>12}")
+    for name, seconds, picked, makespan, busy in rows:
+        print(f"{name:<10}{seconds:>10.3f}{picked:>10}{makespan:>10}{busy:>12}")
+    base, sharded = rows
+    print(f"speedup {base[1] / sharded[1]:.2f}x, "
+          f"items picked {sharded[2] - base[2]:+d} ({(sharded[2] - base[2]) / max(base[2], 1):+.1%})")
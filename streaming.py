@@ -0,0 +1,232 @@
+# streaming.py
+"""
+Bounded-memory allocation over streamed items
+
+load_room and simple_allocation need every `Item` of the room in memory at
+once. Here the Item lines are parsed lazily and allocated in fixed-size
+windows: each item of a window goes to the robot that would reach it first,
+judged from the robots' latest_resting_loc() and total_operation_time(), and
+once the window is done the finished pick-ups are written out and dropped
+(Robot.compact), so only one window of items is ever held. Peak memory
+depends on the window size and the number of robots, not on the number of
+items.
+
+The assignments are written one per line:
+
+    Pick, item_id, robot_id, assigned, picked
+    DropOff, robot_id, arrived, unloaded      (carrying mode)
+    Unpicked, item_id
+
+Examples:
+    python streaming.py big.txt --window 4096 --out picks.txt
+    python streaming.py big.txt --compare
+"""
+
+
+from allocation import deliver_loads, liftable
+from main import load_room, parse_robot, parse_depot, parse_item, simple_allocation
+from robot import travel_times
+import argparse
+import contextlib
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+
+def stream_room(data_filename):
+    """
+    Returns (sim_time, room_size, robots, items) for a room file, where
+    `items` is an iterator that parses the Item lines one at a time. The
+    Robot lines (and the Depot line, if any) must come before the first Item
+    line. The file stays open until `items` is exhausted.
+
+    Parameter:
+    -----------
+
+    data_filename: string; the name of the room file
+    """
+    fid = open(data_filename, 'r')
+    sim_info = fid.readline().strip().split(',')
+    sim_time = int(sim_info[0])
+    room_size = [float(sim_info[1]), float(sim_info[2])]
+
+    robots = []
+    depot = None
+    first_item = None
+    for line in fid:
+        tokens = line.split(',')
+        if tokens[0].strip() == 'Robot':
+            robots.append(parse_robot(tokens, sim_time))
+        elif tokens[0].strip() == 'Depot':
+            depot = parse_depot(tokens)
+        elif tokens[0].strip() == 'Item':
+            first_item = tokens
+            break
+    if depot is not None:
+        for robot in robots:
+            robot.set_depot(*depot)
+
+    def items():
+        with fid:
+            if first_item is None:
+                return
+            yield parse_item(first_item)
+            for line in fid:
+                tokens = line.split(',')
+                if tokens[0].strip() == 'Item':
+                    yield parse_item(tokens)
+                elif tokens[0].strip() in ('Robot', 'Depot'):
+                    raise ValueError(f"{data_filename}: {tokens[0].strip()} line after the first Item line")
+
+    return sim_time, room_size, robots, items()
+
+
+def write_entries(out, robot, entries):
+    """
+    Writes the pick-ups and stops in `entries`, all from `robot`, to `out`
+    and returns the number of items among them.
+    """
+    picked = 0
+    for entry in entries:
+        window = entry.picked_window
+        if not entry.is_stop:
+            out.write(f"Pick, {entry.id_}, {robot.get_id()}, {window.left}, {window.right}\n")
+            picked += 1
+        elif entry.kind == 'drop_off':
+            out.write(f"DropOff, {robot.get_id()}, {window.left}, {window.right}\n")
+    return picked
+
+
+def streaming_allocation(robots, items, out, window=1024, lookahead=8):
+    """
+    Allocates item pickups to the robots window by window, writing the
+    assignments to `out` as it goes. Returns (number of items picked, number
+    of items not picked).
+
+    The robots are compacted after every window and their final trips to the
+    depot are scheduled at the end, so afterwards they only hold their latest
+    stop.
+
+    Parameters:
+    -----------
+
+    robots: list; non-empty list of unique `Robot` references
+
+    items: iterable; the `Item`s, consumed once
+
+    out: file; a text file the assignments are written to
+
+    window: int; number of items held at a time.  Default: 1024
+
+    lookahead: int; how many of the robots that would reach an item first
+    are asked to pick it up.  Default: 8
+    """
+    max_weight = np.array([robot._max_weight for robot in robots], dtype=float)
+    n_picked = n_remaining = 0
+    items = iter(items)
+    for batch in iter(lambda: list(itertools.islice(items, window)), []):
+        # Where and when every robot is free at the start of the window
+        free = np.array([robot.total_operation_time() for robot in robots], dtype=float)
+        rest = np.array([robot.latest_resting_loc() for robot in robots], dtype=float)
+
+        for item, ok in zip(batch, liftable(robots, batch)):
+            if not ok:
+                out.write(f"Unpicked, {item.id_}\n")
+                n_remaining += 1
+                continue
+            arrival = free + travel_times(rest, item.loc)
+            arrival[max_weight < item.weight] = np.inf
+            if len(robots) > lookahead:
+                candidates = np.argpartition(arrival, lookahead)[:lookahead]
+            else:
+                candidates = np.arange(len(robots))
+            candidates = candidates[np.argsort(arrival[candidates], kind='stable')]
+            for n in candidates.tolist():
+                if arrival[n] == np.inf:
+                    break
+                robot = robots[n]
+                if robot.pick(item, do_pick=True, num_arms=0):
+                    free[n] = robot.total_operation_time()
+                    rest[n] = robot.latest_resting_loc()
+                    break
+            if item.picked_window is None:
+                out.write(f"Unpicked, {item.id_}\n")
+                n_remaining += 1
+
+        # Write out and forget everything but each robot's latest stop
+        for robot in robots:
+            n_picked += write_entries(out, robot, robot.compact())
+
+    deliver_loads(robots)
+    for robot in robots:
+        n_picked += write_entries(out, robot, robot.compact())
+        n_picked += write_entries(out, robot, robot._items_picked)
+    return n_picked, n_remaining
+
+
+def _measure(run):
+    """
+    Returns (seconds, peak traced memory in bytes, result) of calling `run`
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def compare(data_filename, window=1024):
+    """
+    Prints time, peak memory and items picked of full-batch allocation
+    (load_room and simple_allocation) and of streaming_allocation on the
+    same room file.
+
+    Parameters:
+    -----------
+
+    data_filename: string; the name of the room file
+
+    window: int; the window size of the streaming allocation.  Default: 1024
+    """
+    def full_batch():
+        sim_time, room_size, robots, items = load_room(data_filename)
+        items_remaining = simple_allocation(robots, items)
+        return len(items) - len(items_remaining), len(items_remaining)
+
+    def streamed():
+        sim_time, room_size, robots, items = stream_room(data_filename)
+        with open(os.devnull, 'w') as out:
+            return streaming_allocation(robots, items, out, window)
+
+    print(f"{data_filename}:")
+    print(f"  {'':<12}{'seconds':>10}{'peak MiB':>10}{'picked':>10}{'items/s':>12}")
+    for name, run in (('full batch', full_batch), (f'window {window}', streamed)):
+        seconds, peak, (picked, remaining) = _measure(run)
+        print(f"  {name:<12}{seconds:>10.3f}{peak / 2**20:>10.2f}{picked:>10}"
+              f"{(picked + remaining) / seconds:>12.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Allocate a room's items in bounded memory.")
+    parser.add_argument('rooms', nargs='+', help="room files")
+    parser.add_argument('--window', type=int, default=1024, help="items held at a time (default: 1024)")
+    parser.add_argument('--out', default='-', help="file for the assignments (default: standard output)")
+    parser.add_argument('--compare', action='store_true',
+                        help="compare time, peak memory and items picked with full-batch allocation")
+    args = parser.parse_args()
+
+    if args.compare:
+        for data_filename in args.rooms:
+            compare(data_filename, args.window)
+    else:
+        out = contextlib.nullcontext(sys.stdout) if args.out == '-' else open(args.out, 'w')
+        with out as out:
+            for data_filename in args.rooms:
+                sim_time, room_size, robots, items = stream_room(data_filename)
+                picked, remaining = streaming_allocation(robots, items, out, args.window)
+                print(f"{data_filename}: {picked} items picked, {remaining} not picked", file=sys.stderr)
@@ -5,9 +5,27 @@ Demonstration and tests for Project 5 classes
 
 
 from interval import Interval
-from item import Item
+from item import Item, Idle
 from robot import Robot
+from cache import ResultCache, to_arrays as cache_arrays
+from carrying import batched_allocation
+from sharding import sharded_allocation
+from instrument import Instrumentation
+import checkpoint
+import cli
+import edf
+import feed
+import generate
+import io
+import main
+import repair
+import streaming
+import asyncio
+import json
+import os
+import tempfile
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 ## Test class Interval
@@ -143,3 +161,383 @@ print(f"{loc_t2=}")                         # Should be [5, 5]
 loc_t13 = robot1.get_location(13)
 print(f"{loc_t13=}")                        # Should be [9, 1]
 
+## Test release and due times
+# Test available_window method
+i5 = Item(10, 'crate', 1, [6, 4], 0, 2, 8, 12)
+print(f"{i5.available_window()}")          # Should be Interval [8.00, 12.00]
+print(f"{i3.available_window()}")          # Should be Interval [0.00, inf]
+
+# Test pick method with a release time
+# Test case 1: Robot arrives at time 2 and waits until the release time 8
+robot3 = Robot(5, 10, 20, [4, 4])
+result5 = robot3.pick(i5, do_pick=True, num_arms=0)
+print(f"{result5=}")                        # Should be True
+print(f"{i5.picked_window.left=}")          # Should be 8 (waited from time 2)
+print(f"{robot3.get_location(5)=}")         # Should be [6, 4] (waiting at the item)
+# Test case 2: The deadline cannot be met
+i6 = Item(11, 'lamp', 1, [6, 9], 0, 2, 0, 14)
+result6 = robot3.pick(i6, do_pick=True, num_arms=0)
+print(f"{result6=}")                        # Should be False (would finish at 17)
+
+## Test carrying mode
+# Test case 1: The robot unloads at the depot before the load would exceed its max weight
+robot4 = Robot(6, 10, 50, [0, 0])
+robot4.set_depot([0, 0], unload_time=1)
+i7 = Item(12, 'tire', 6, [2, 0], 0, 1)
+i8 = Item(13, 'drum', 6, [4, 0], 0, 1)
+print(f"{robot4.pick(i7, do_pick=True, num_arms=0)=}")  # Should be True
+print(f"{robot4.pick(i8, do_pick=True, num_arms=0)=}")  # Should be True
+drop_off = robot4.get_items_picked()[1]
+print(f"{drop_off.is_stop=}")               # Should be True
+print(f"{drop_off.picked_window}")          # Should be Interval [5.00, 6.00]
+print(f"{i8.picked_window}")                # Should be Interval [10.00, 11.00]
+print(f"{robot4.get_location(5)=}")         # Should be [0, 0] (at the depot)
+# Test case 2: The final trip to the depot
+print(f"{robot4.deliver_load()=}")          # Should be True
+print(f"{robot4.total_operation_time()=}")  # Should be 16
+
+## Test idle stops
+# Test case 1: A robot stays put during an idle stop
+robot5 = Robot(7, 10, 30, [0, 0])
+i9 = Item(14, 'vase', 1, [3, 0], 0, 1)
+print(f"{robot5.pick(i9, do_pick=True, num_arms=0)=}")  # Should be True
+idle = Idle([3, 0], 5)
+idle.update_pickup_status(4)
+robot5.load_items_picked([i9, idle])
+print(f"{robot5.total_operation_time()=}")  # Should be 9
+print(f"{robot5.get_location(6)=}")         # Should be [3, 0]
+print(idle.describe())                      # Should be Idle from time 4 to time 9
+
+## Test compact method
+# Test case 1: Only the latest pick-up is kept; the robot's state is unchanged
+robot6 = Robot(8, 10, 30, [0, 0])
+i10 = Item(15, 'mug', 1, [2, 0], 0, 1)
+i11 = Item(16, 'bowl', 1, [2, 3], 0, 1)
+robot6.pick(i10, do_pick=True, num_arms=0)
+robot6.pick(i11, do_pick=True, num_arms=0)
+forgotten = robot6.compact()
+print(f"{[item.id_ for item in forgotten]=}")  # Should be [15]
+print(f"{len(robot6.get_items_picked())=}")    # Should be 1
+print(f"{robot6.total_operation_time()=}")     # Should be 7
+print(f"{robot6.latest_resting_loc()=}")       # Should be [2, 3]
+
+## Test checkpoint round trips
+# Test case 1: Picked items only
+robot7 = Robot(9, 10, 40, [0, 0])
+i12 = Item(17, 'sock', 1, [3, 0], 0, 1)
+i13 = Item(18, 'shoe', 1, [3, 2], 0, 1)
+robot7.pick(i12, do_pick=True, num_arms=0)
+robot7.pick(i13, do_pick=True, num_arms=0)
+data1 = checkpoint.dumps([robot7], [i12, i13])
+robot7b = Robot(9, 10, 40, [0, 0])
+i12b = Item(17, 'sock', 1, [3, 0], 0, 1)
+i13b = Item(18, 'shoe', 1, [3, 2], 0, 1)
+checkpoint.loads(data1, [robot7b], [i12b, i13b])
+print(f"{[item.id_ for item in robot7b.get_items_picked()]=}")  # Should be [17, 18]
+print(f"{i13b.picked_window}")              # Should be Interval [6.00, 7.00]
+print(f"{checkpoint.dumps([robot7b], [i12b, i13b]) == data1=}")  # Should be True
+# Test case 2: Depot drop-offs
+robot8 = Robot(10, 10, 50, [0, 0])
+robot8.set_depot([0, 0])
+i14 = Item(19, 'tire', 6, [2, 0], 0, 1)
+i15 = Item(20, 'drum', 6, [4, 0], 0, 1)
+robot8.pick(i14, do_pick=True, num_arms=0)
+robot8.pick(i15, do_pick=True, num_arms=0)
+robot8.deliver_load()
+data2 = checkpoint.dumps([robot8], [i14, i15])
+robot8b = Robot(10, 10, 50, [0, 0])
+robot8b.set_depot([0, 0])
+i14b = Item(19, 'tire', 6, [2, 0], 0, 1)
+i15b = Item(20, 'drum', 6, [4, 0], 0, 1)
+checkpoint.loads(data2, [robot8b], [i14b, i15b])
+print(f"{[item.is_stop for item in robot8b.get_items_picked()]=}")  # Should be [False, True, False, True]
+print(f"{robot8b.total_operation_time()=}")  # Should be 16
+print(f"{checkpoint.dumps([robot8b], [i14b, i15b]) == checkpoint.dumps([robot8], [i14, i15])=}")  # Should be True
+# Test case 3: Idle stops
+robot9 = Robot(11, 10, 40, [0, 0])
+i16 = Item(21, 'kite', 1, [1, 1], 0, 1)
+robot9.pick(i16, do_pick=True, num_arms=0)
+idle2 = Idle([1, 1], 4)
+idle2.update_pickup_status(3)
+robot9.load_items_picked([i16, idle2])
+data3 = checkpoint.dumps([robot9], [i16])
+robot9b = Robot(11, 10, 40, [0, 0])
+i16b = Item(21, 'kite', 1, [1, 1], 0, 1)
+checkpoint.loads(data3, [robot9b], [i16b])
+print(robot9b.get_items_picked()[1].describe())  # Should be Idle from time 3 to time 7
+# Test case 4: A room whose item ids do not match is rejected
+try:
+    checkpoint.loads(data3, [robot9b], [Item(22, 'kite', 1, [1, 1], 0, 1)])
+except ValueError as error:
+    print(error)                            # Should be Checkpoint item ids do not match the room
+# Test case 5: loads restores a picked_window changed outside the robots
+room7 = [i12b, i13b]
+i12b.picked_window = None
+checkpoint.loads(data1, [robot7b], room7)
+print(f"{i12b.picked_window}")              # Should be Interval [3.00, 4.00]
+# Test case 6: A branch reverts a what-if change to a robot's schedule
+branch = checkpoint.Branch(data1, [robot7b], room7)
+robot7b.load_items_picked([])               # What if the robot picked nothing?
+i12b.picked_window = i13b.picked_window = None
+branch.revert()                             # Only restores robot7b
+print(f"{[item.id_ for item in robot7b.get_items_picked()]=}")  # Should be [17, 18]
+print(f"{i12b.picked_window}")              # Should be Interval [3.00, 4.00]
+
+## Test schedule repair
+# Test case 1: remove_robot keeps completed pick-ups and reassigns the rest
+robot10 = Robot(12, 10, 40, [0, 0])
+robot11 = Robot(13, 10, 40, [5, 5])
+i17 = Item(23, 'cup', 1, [2, 0], 0, 1)
+i18 = Item(24, 'jar', 1, [6, 0], 0, 1)
+robot10.pick(i17, do_pick=True, num_arms=0)
+robot10.pick(i18, do_pick=True, num_arms=0)
+print(f"{repair.remove_robot([robot10, robot11], robot10, 5)=}")  # Should be []
+print(f"{i17.picked_window}")               # Should be Interval [2.00, 3.00]
+print(robot10.get_items_picked()[-1].describe())  # Should be Idle from time 5 to time 40
+print(f"{[item.id_ for item in robot11.get_items_picked()]=}")  # Should be [None, 24]
+print(f"{i18.picked_window}")               # Should be Interval [11.00, 12.00]
+# Test case 2: An unfinished item fits into another robot's wait for a release
+robot12 = Robot(14, 10, 40, [0, 0])
+robot13 = Robot(15, 10, 40, [0, 0])
+i19 = Item(25, 'pen', 1, [2, 0], 0, 1)
+i20 = Item(26, 'ink', 1, [1, 0], 0, 1, 20)
+i21 = Item(27, 'cap', 1, [3, 0], 0, 1)
+robot12.pick(i19, do_pick=True, num_arms=0)
+robot12.pick(i20, do_pick=True, num_arms=0)
+robot13.pick(i21, do_pick=True, num_arms=0)
+print(f"{repair.remove_robot([robot12, robot13], robot13, 2)=}")  # Should be []
+print(f"{[item.id_ for item in robot12.get_items_picked()]=}")  # Should be [25, 27, 26]
+print(f"{i21.picked_window}")               # Should be Interval [4.00, 5.00]
+print(f"{i20.picked_window}")               # Should be Interval [20.00, 21.00]
+# Test case 3: A suspended robot in carrying mode first unloads at the depot
+robot14 = Robot(16, 10, 50, [0, 0])
+robot14.set_depot([0, 0])
+i22 = Item(28, 'bolt', 1, [3, 0], 0, 1)
+i23 = Item(29, 'nut', 1, [5, 0], 0, 1)
+robot14.pick(i22, do_pick=True, num_arms=0)
+robot14.pick(i23, do_pick=True, num_arms=0)
+robot14.deliver_load()
+print(f"{repair.suspend_robot([robot14], robot14, 5, 30)=}")  # Should be []
+# Should be Interval [3.00, 4.00], Depot drop-off: arrived at time 9, unloaded at
+# time 10, Idle from time 10 to time 30, Interval [35.00, 36.00], Depot drop-off:
+# arrived at time 41, unloaded at time 42
+for stop in robot14.get_items_picked():
+    print(stop.describe() if stop.is_stop else stop.picked_window)
+# Test case 4: A robot cannot be suspended beyond the end of its shift
+try:
+    repair.suspend_robot([robot14], robot14, 5, 60)
+except ValueError as error:
+    print(error)                            # Should be Cannot suspend robot 16 from 5 until 60
+
+## Test the edf strategy
+# Test case 1: A light robot is not held up by items too heavy for it
+robot15 = Robot(17, 1, 200, [0, 0])
+robot16 = Robot(18, 10, 200, [50, 50])
+heavy = [Item(100 + k, 'crate', 5, [50, 50], 0, 1, 0, 60 + k) for k in range(100)]
+light = [Item(200 + k, 'card', 1, [1, 0], 0, 1) for k in range(10)]
+print(f"{edf.edf_allocation([robot15, robot16], heavy + light)=}")  # Should be []
+print(f"{len(robot15.get_items_picked())=}")  # Should be 10
+# Test case 2: Items wait for their release; a deadline no robot can meet is dropped
+robot17 = Robot(19, 5, 50, [0, 0])
+i24 = Item(30, 'memo', 1, [10, 0], 0, 1, 0, 5)
+i25 = Item(31, 'note', 1, [2, 0], 0, 1, 4, 8)
+i26 = Item(32, 'card', 1, [3, 0], 0, 1)
+print(f"{[item.id_ for item in edf.edf_allocation([robot17], [i24, i25, i26])]=}")  # Should be [30]
+print(f"{[item.id_ for item in robot17.get_items_picked()]=}")  # Should be [32, 31]
+print(f"{edf.deadline_report([i24, i25, i26])=}")  # Should be (2, 1, 0.5)
+# Test case 3: A robot that cannot make the deadlines waits for a release it can take
+far = Robot(21, 5, 500, [100, 0])
+near = Robot(22, 5, 500, [0, 0])
+stream = [Item(500 + k, 'slip', 1, [0, 0], 0, 1, k, k + 5) for k in range(50)]
+parcel = Item(550, 'parcel', 1, [100, 0], 0, 1, 60)
+print(f"{edf.edf_allocation([far, near], stream + [parcel])=}")  # Should be []
+print(f"{[item.id_ for item in far.get_items_picked()]=}")  # Should be [550]
+# Test case 4: A room without robots leaves every item
+idle_stock = [Item(560 + k, 'slip', 1, [k, 0], 0, 1, k, k + 5) for k in range(5)]
+print(f"{len(edf.edf_allocation([], idle_stock))=}")  # Should be 5
+print(f"{streaming.streaming_allocation([], idle_stock, io.StringIO())=}")  # Should be (0, 5)
+
+## Test the batched strategy
+# Test case 1: Items past their due time do not keep a robot from the others
+robot18 = Robot(20, 10, 100, [0, 0])
+expired = [Item(300 + k, 'flyer', 1, [1, 0], 0, 1, 0, 0) for k in range(20)]
+bricks = [Item(400 + k, 'brick', 1, [5 + k, 3], 0, 1) for k in range(5)]
+print(f"{len(batched_allocation([robot18], expired + bricks))=}")  # Should be 20
+print(f"{[item.id_ for item in robot18.get_items_picked()]=}")  # Should be [400, 401, 402, 403, 404]
+# Test case 2: Each trip takes the nearest items that still fit in the load
+robot19 = Robot(21, 4, 100, [0, 0])
+robot19.set_depot([0, 0])
+i27 = Item(33, 'vase', 2, [5, 0], 0, 1)
+i28 = Item(34, 'lamp', 3, [1, 0], 0, 1)
+i29 = Item(35, 'bowl', 2, [6, 0], 0, 1)
+print(f"{batched_allocation([robot19], [i27, i28, i29])=}")  # Should be []
+print(f"{[item.id_ for item in robot19.get_items_picked()]=}")  # Should be [34, None, 33, 35, None]
+print(f"{robot19.total_operation_time()=}")  # Should be 19
+# Test case 3: A room without robots leaves every item
+print(f"{len(batched_allocation([], [Item(36 + k, 'cup', 1, [k, 0], 0, 1) for k in range(4)]))=}")  # Should be 4
+
+## Test the sharded strategy
+# Test case 1: Items in a corner far from every robot's tile are still offered
+robot24 = Robot(24, 10, 1000, [0, 0])
+corner = [Item(600 + k, 'crate', 1, [90, 90], 0, 1) for k in range(3)]
+print(f"{sharded_allocation([robot24], corner, tiles=4, workers=1, room_size=[100, 100])=}")  # Should be []
+print(f"{[item.id_ for item in robot24.get_items_picked()]=}")  # Should be [600, 601, 602]
+# Test case 2: A room without robots leaves every item
+crates = [Item(610 + k, 'crate', 1, [10 * k, 0], 0, 1) for k in range(3)]
+print(f"{len(sharded_allocation([], crates, tiles=2, workers=2, room_size=[100, 100]))=}")  # Should be 3
+
+## Test the result cache
+with tempfile.TemporaryDirectory() as directory:
+    # Test case 1: A carrying-mode allocation comes back from the disk unchanged
+    robot20 = Robot(22, 10, 50, [0, 0])
+    robot20.set_depot([0, 0])
+    i30 = Item(36, 'tire', 6, [2, 0], 0, 1)
+    i31 = Item(37, 'drum', 6, [4, 0], 0, 1)
+    batched_allocation([robot20], [i30, i31])
+    ResultCache(directory).put('room', 50, [10, 10], [robot20], [i30, i31])
+    cache = ResultCache(directory)          # A new cache with an empty memo
+    sim_time, room_size, robots, items, items_remaining = cache.get('room')
+    print(f"{[item.id_ for item in robots[0].get_items_picked()]=}")  # Should be [36, None, 37, None]
+    print(f"{robots[0].total_operation_time() == robot20.total_operation_time()=}")  # Should be True
+    print(f"{cache.get('room') is not None=}")  # Should be True
+    print(f"{cache.stats()['hits']=}, {cache.stats()['memo_hits']=}")  # Should be 2 and 1
+    # Test case 2: The least recently used entry is evicted first
+    cache = ResultCache(directory, max_bytes=1)
+    cache.put('other', 50, [10, 10], [robot20], [i30, i31])
+    print(f"{sorted(os.listdir(directory))=}")  # Should be ['other.npz']
+    print(f"{cache.stats()['evictions']=}")  # Should be 1
+    # Test case 3: Broken entries are removed and count as misses
+    with open(os.path.join(directory, 'other.npz'), 'rb') as fid:
+        data = fid.read()
+    with open(os.path.join(directory, 'cut.npz'), 'wb') as fid:
+        fid.write(data[:len(data) // 2])    # Cut short by a crash
+    open(os.path.join(directory, 'empty.npz'), 'wb').close()
+    arrays = cache_arrays(50, [10, 10], [robot20], [i30, i31])
+    arrays['item_ids'] = arrays['item_ids'] + 1  # The schedule no longer matches the room
+    np.savez(os.path.join(directory, 'stale.npz'), **arrays)
+    cache = ResultCache(directory)
+    print(f"{[cache.get(key) for key in ('cut', 'empty', 'stale', 'gone')]=}")  # Should be [None, None, None, None]
+    print(f"{cache.stats()['misses']=}")     # Should be 4
+    print(f"{sorted(os.listdir(directory))=}")  # Should be ['other.npz']
+
+## Test schedule edits on a Robot
+robot21 = Robot(23, 10, 20, [0, 0])
+robot21.add_idle([0, 0], 0, 5)
+print(f"{robot21.total_operation_time()=}")  # Should be 5
+print(robot21.remove_latest_stop().describe())  # Should be Idle from time 0 to time 5
+i32 = Item(38, 'pin', 1, [2, 0], 0, 1, 6)
+i33 = Item(39, 'tack', 1, [1, 0], 0, 1)
+robot21.pick(i32, do_pick=True, num_arms=0)
+robot21.insert_pick(0, i33, 1)            # While waiting for the release of i32
+print(f"{[item.id_ for item in robot21.get_items_picked()]=}")  # Should be [39, 38]
+try:
+    robot21.remove_latest_stop()
+except ValueError as error:
+    print(error)                            # Should be Robot 23 has no stop to remove
+
+## Test parse_item with release and due times
+i34 = main.parse_item('Item, 40, rope, 2, [1,2], 0, 1, , 9'.split(','))
+print(f"{i34.release_time=}, {i34.due_time=}")  # Should be 0 and 9
+i35 = main.parse_item('Item, 41, wire, 2, [1,2], 0, 1, 4,'.split(','))
+print(f"{i35.release_time=}, {i35.due_time=}")  # Should be 4 and None
+
+## Test the live position feed
+# Test case 1: A subscriber that reads nothing is resynced and still gets the end
+async def feed_backlog():
+    server = feed.FeedServer(queue_size=2)
+    tcp = await server.start_tcp(port=0)
+    reader, writer = await asyncio.open_connection(*tcp.sockets[0].getsockname()[:2])
+    await asyncio.sleep(0.1)                # Connected, then reads nothing while the feed runs
+    for t in range(10):
+        server.publish(t, {1: [t, 0]}, [{'event': 'picked', 'item': 700 + t, 'robot': 1}])
+    server.finish()
+    resyncs = [subscriber.resyncs for subscriber in server._subscribers]
+    lines = [json.loads(line) for line in (await reader.read()).splitlines()]
+    writer.close()
+    await server.close()
+    return resyncs, lines
+resyncs, lines = asyncio.run(feed_backlog())
+print(f"{resyncs=}")                        # Should be [5]
+print(f"{[line['type'] for line in lines]=}")  # Should be ['snapshot', 'snapshot', 'end']
+print(f"{lines[1]['t'], len(lines[1]['picked'])=}")  # Should be (9, 10)
+
+## Test the hot-path instrumentation
+# Test case 1: Calls are counted while active and the originals come back after
+original_pick = Robot.pick
+robot25 = Robot(25, 10, 50, [0, 0])
+parcels = [Item(720 + k, 'parcel', 1, [k + 1, 0], 0, 1) for k in range(3)]
+with Instrumentation() as inst:
+    print(f"{Robot.pick is original_pick=}")  # Should be False
+    main.simple_allocation([robot25], parcels + [Item(723, 'piano', 50, [9, 9], 0, 1)])
+print(f"{Robot.pick is original_pick=}")  # Should be True
+print(f"{inst.calls['Robot.pick'][0]=}, {inst.calls['Item.valid_pickup'][0]=}")  # Should be 4, 4
+# Test case 2: The originals come back when the block raises
+try:
+    with Instrumentation():
+        raise KeyError('boom')
+except KeyError:
+    pass
+print(f"{Robot.pick is original_pick=}")  # Should be True
+
+## Test the streaming allocation
+# Test case 1: Every item is written once and as many are picked as by simple_allocation
+sim_time, room_size, robots, items = streaming.stream_room('room1.txt')
+out = io.StringIO()
+print(f"{streaming.streaming_allocation(robots, items, out, window=2)=}")  # Should be (3, 2)
+streamed_ids = [line.split(',')[1].strip() for line in out.getvalue().splitlines()
+                if line.startswith(('Pick', 'Unpicked'))]
+print(f"{sorted(streamed_ids) == sorted(set(streamed_ids))=}, {len(streamed_ids)=}")  # Should be True, 5
+sim_time, room_size, robots, items = main.load_room('room1.txt')
+print(f"{len(items) - len(main.simple_allocation(robots, items))=}")  # Should be 3
+# Test case 2: A Robot or Depot line after the first Item line is rejected
+with tempfile.TemporaryDirectory() as directory:
+    late = os.path.join(directory, 'late.txt')
+    for line in ('Robot, 1, 4, [4,4]', 'Depot, [0,0]'):
+        with open(late, 'w') as fid:
+            fid.write(f"20, 10, 8\nItem, 1, cup, 1, [1,1], 0, 1\n{line}\n")
+        sim_time, room_size, robots, items = streaming.stream_room(late)
+        try:
+            list(items)
+        except ValueError as error:
+            print(os.path.basename(str(error)))  # Should be late.txt: Robot (then Depot) line after the first Item line
+
+## Test the command line helpers
+# Test case 1: parse_params reads literals, keeps other values as strings and rejects a KEY without =
+print(f"{cli.parse_params(['window=8', 'depot=(0, 0)', 'ratio=0.5'])=}")  # Should be {'window': 8, 'depot': (0, 0), 'ratio': 0.5}
+print(f"{cli.parse_params(['order=due', 'name=a b'])=}")  # Should be {'order': 'due', 'name': 'a b'}
+try:
+    cli.parse_params(['window'])
+except ValueError as error:
+    print(error)  # Should be Expected KEY=VALUE, got 'window'
+# Test case 2: Repeated stages of a StageTimer add up
+timer = cli.StageTimer()
+with timer.stage('parse'):
+    pass
+first = timer.timings['parse']
+with timer.stage('allocate'):
+    pass
+with timer.stage('parse'):
+    pass
+print(f"{list(timer.timings)=}, {timer.timings['parse'] > first=}")  # Should be ['parse', 'allocate'], True
+# Test case 3: export_results writes JSON that reads back to the allocation
+sim_time, room_size, robots, items = main.load_room('room1.txt')
+items_remaining = main.simple_allocation(robots, items)
+with tempfile.TemporaryDirectory() as directory:
+    results_file = os.path.join(directory, 'results.json')
+    main.export_results(robots, items_remaining, results_file)
+    with open(results_file) as fid:
+        results = json.load(fid)
+print(f"{[robot['id'] for robot in results['robots']] == [robot.get_id() for robot in robots]=}")  # Should be True
+print(f"{sum(len(robot['items']) for robot in results['robots'])=}")  # Should be 3
+print(f"{[item['id'] for item in results['items_remaining']] == [item.id_ for item in items_remaining]=}")  # Should be True
+
+## Test the room generator
+# Test case 1: The same seed writes the same room, with the requested robots and items
+with tempfile.TemporaryDirectory() as directory:
+    rooms = [os.path.join(directory, f'room{k}.txt') for k in range(2)]
+    for room in rooms:
+        generate.write_room(room, 3, 40, 20, 20, 100, distribution='clustered', seed=7)
+    with open(rooms[0], 'rb') as first, open(rooms[1], 'rb') as second:
+        print(f"{first.read() == second.read()=}")  # Should be True
+    sim_time, room_size, robots, items = main.load_room(rooms[0])
+print(f"{sim_time, room_size, len(robots), len(items)=}")  # Should be (100, [20.0, 20.0], 3, 40)